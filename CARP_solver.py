@@ -1,16 +1,13 @@
 #!/usr/bin/env python3
-import sys
 import argparse
+from apsp import floyd
+from arcs import ArcModel
+from greedy import NearestIndex
+from loader import load
+from writer import FORMATS, write
 
 INF = 0x3f3f3f3f
 
-class Edge:
-    def __init__(self, x, y, z, c):
-        self.x = x
-        self.y = y
-        self.z = z
-        self.c = c
-
 def main():
     # 1) parse command line: first positional is your .dat file,
     #    then optional -t <termination> and -s <seed>
@@ -21,83 +18,36 @@ def main():
                         help='termination time (unused by solver)')
     parser.add_argument('-s', '--seed', type=int,
                         help='random seed (unused by solver)')
+    parser.add_argument('--format', choices=FORMATS, default='text',
+                        help='answer as s/q text, JSON or binary route arrays')
     args = parser.parse_args()
 
-    # 2) re‑wire stdin to read from that file:
-    sys.stdin = open(args.instance_file, 'r')
-
-    # 3) if you want to use the seed, you can do:
+    # 2) if you want to use the seed, you can do:
     if args.seed is not None:
         import random
         random.seed(args.seed)
 
-    # ——— below this line everything is exactly as before ———
-    _      = sys.stdin.readline().split()          # NAME : XXX
-    parts  = sys.stdin.readline().split(); n  = int(parts[2])
-    parts  = sys.stdin.readline().split(); st = int(parts[2])
-    parts  = sys.stdin.readline().split(); m1 = int(parts[3])
-    parts  = sys.stdin.readline().split(); m2 = int(parts[3])
-    parts  = sys.stdin.readline().split(); T  = int(parts[2])
-    parts  = sys.stdin.readline().split(); Q  = int(parts[2])
-    parts  = sys.stdin.readline().split(); B  = int(parts[6])
-    _      = sys.stdin.readline()                  # NODES COST DEMAND
-
-    m = m1 + m2
+    # 3) header by key, edge block in one parse
+    inst = load(args.instance_file)
+    n, st, Q = inst.n, inst.depot, inst.capacity
 
     g = [[INF] * (n+1) for _ in range(n+1)]
     for i in range(1, n+1):
         g[i][i] = 0
 
-    e = []
-    for _ in range(m):
-        x, y, z, c = map(int, sys.stdin.readline().split())
-        if c > 0:
-            e.append(Edge(x, y, z, c))
+    for x, y, z, c in inst.edges.tolist():
         g[x][y] = g[y][x] = z
 
-    _ = sys.stdin.readline()  # END
-
     # Floyd–Warshall
-    for k in range(1, n+1):
-        for i in range(1, n+1):
-            for j in range(1, n+1):
-                if g[i][j] > g[i][k] + g[k][j]:
-                    g[i][j] = g[i][k] + g[k][j]
-
-    ans = []
-    val = 0
+    floyd(n, g)
 
-    while e:
-        p = st
-        q = Q
-        res = []
-        while e:
-            e.sort(key=lambda ed: min(g[p][ed.x], g[p][ed.y]))
-            idx = next((i for i, ed in enumerate(e) if ed.c <= q), -1)
-            if idx < 0:
-                break
-            ed = e.pop(idx)
-            if g[p][ed.x] > g[p][ed.y]:
-                ed.x, ed.y = ed.y, ed.x
-            val += g[p][ed.x] + ed.z
-            res.append(ed)
-            q -= ed.c
-            p = ed.y
-        if res:
-            val += g[p][st]
-            ans.append(res)
+    # nearest task that still fits, read from per-vertex sorted lists
+    # instead of re-sorting every remaining edge at each step
+    index = NearestIndex(ArcModel(inst.tasks(), g, st))
+    ans, val = index.build(range(len(index.model)), Q)
 
-    # output goes to stdout as usual
-    print("s ", end="")
-    for i, route in enumerate(ans):
-        print("0,", end="")
-        for ed in route:
-            print(f"({ed.x},{ed.y}),", end="")
-        if i == len(ans) - 1:
-            print("0")
-        else:
-            print("0,", end="")
-    print(f"q {val}")
+    # output goes to stdout as usual, in one write
+    write(ans, val, args.format)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,95 @@
+# ------------------------------------------------------------
+#  All-pairs shortest paths shared by the solvers and legal.py
+# ------------------------------------------------------------
+from heapq import heappush, heappop
+from typing import Iterable, List, Tuple
+import numpy as np
+
+INF = 0x3f3f3f3f
+SPARSE_RATIO = 4     # n > ratio * |keys| → Dijkstra from the keys only
+
+def _dtype(big: int):
+    # two entries are added before np.minimum, so the sum must not overflow
+    return np.int32 if 2 * big < 2**31 else np.int64
+
+# ---------------------------------------------------------------- Floyd-Warshall
+def floyd_warshall(mat: np.ndarray) -> np.ndarray:
+    """Vectorised Floyd-Warshall: one whole-matrix relaxation per k, in place."""
+    tmp = np.empty_like(mat)
+    for k in range(mat.shape[0]):
+        np.add(mat[:, k, None], mat[k], out=tmp)
+        np.minimum(mat, tmp, out=mat)
+    return mat
+
+def shortest_paths(n: int, arcs: Iterable[Tuple[int,int,int]],
+                   inf: int = INF, dtype=None) -> np.ndarray:
+    """(n+1)x(n+1) distance matrix for an undirected graph on vertices 1..n."""
+    arcs = np.asarray(list(arcs), dtype=np.int64).reshape(-1, 3)
+    big = max(inf, int(arcs[:, 2].max()) if len(arcs) else 0)
+    mat = np.full((n+1, n+1), inf, dtype=dtype or _dtype(big))
+    u, v, z = arcs[:, 0], arcs[:, 1], arcs[:, 2]
+    np.minimum.at(mat, (u, v), z)
+    np.minimum.at(mat, (v, u), z)
+    idx = np.arange(1, n+1)
+    mat[idx, idx] = 0
+    return floyd_warshall(mat)
+
+def floyd(n: int, g: List[List[int]]):
+    """Drop-in for the list-of-lists floyd(): relaxes g in place with NumPy."""
+    big = max(max(row) for row in g)
+    mat = floyd_warshall(np.array(g, dtype=_dtype(big)))
+    g[:] = mat.tolist()
+
+# ---------------------------------------------------------------- sparse Dijkstra
+def adjacency(n: int, arcs: Iterable[Tuple[int,int,int]]) -> List[List[Tuple[int,int]]]:
+    adj: List[List[Tuple[int,int]]] = [[] for _ in range(n+1)]
+    for u, v, z in arcs:
+        adj[u].append((v, z))
+        adj[v].append((u, z))
+    return adj
+
+def dijkstra(adj, src: int, targets: Iterable[int], inf: int = INF) -> List[int]:
+    """Heap Dijkstra from src; stops once every target vertex is settled."""
+    dist = [inf] * len(adj)
+    dist[src] = 0
+    left = set(targets)
+    heap = [(0, src)]
+    while heap and left:
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        left.discard(u)
+        for v, z in adj[u]:
+            nd = d + z
+            if nd < dist[v]:
+                dist[v] = nd
+                heappush(heap, (nd, v))
+    return dist
+
+def key_matrix(n: int, arcs: Iterable[Tuple[int,int,int]],
+               keys: List[int], inf: int = INF) -> List[List[int]]:
+    """Compact |keys| x |keys| distance matrix, row i being Dijkstra from keys[i]."""
+    adj = adjacency(n, arcs)
+    return [[row[b] for b in keys]
+            for row in (dijkstra(adj, a, keys, inf) for a in keys)]
+
+def distance_matrix(n: int, arcs: List[Tuple[int,int,int]], keys: Iterable[int]):
+    """
+    Returns (mat, keys).  Dense Floyd-Warshall over all vertices (keys None)
+    when the graph is small; when n is large next to the depot/task
+    endpoints only their compact matrix is computed, row i for keys[i].
+    """
+    keys = sorted(set(keys))
+    if n <= SPARSE_RATIO * len(keys):
+        return shortest_paths(n, arcs), None
+    return np.array(key_matrix(n, arcs, keys), dtype=np.int64), keys
+
+def as_table(mat, keys=None):
+    """Distance table read as dist[a][b]: lists when dense, dict rows when compact."""
+    if keys is None:
+        return mat.tolist()
+    keys = [int(k) for k in keys]
+    return {a: dict(zip(keys, row)) for a, row in zip(keys, mat.tolist())}
+
+def distances(n: int, arcs: List[Tuple[int,int,int]], keys: Iterable[int]):
+    return as_table(*distance_matrix(n, arcs, keys))
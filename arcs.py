@@ -0,0 +1,61 @@
+# ------------------------------------------------------------
+#  Arc-indexed model – deadheads and task data as integer arrays
+# ------------------------------------------------------------
+#  Oriented service arcs are numbered as in TaskTable (2t = task t served
+#  u -> v, 2t+1 = v -> u) and id 2T stands for the depot.  D[a][b] is the
+#  deadhead from the end of a to the start of b, so leaving the depot is
+#  D[depot_id][b] and returning is D[a][depot_id]; with cost[a] and
+#  demand[a] a route or a move is priced by list indexing alone.
+from typing import Dict, Iterable, List, Tuple
+from solution import TaskTable
+
+Route = List[Tuple[int,int]]
+ArcRoute = List[int]
+
+class ArcModel(TaskTable):
+    """TaskTable plus the (2T+1) x (2T+1) deadhead matrix."""
+    __slots__ = ("depot", "depot_id", "D", "depot_out", "depot_in")
+
+    def __init__(self, tasks: Iterable[Tuple[int,int,int,int]], dist, depot: int):
+        super().__init__(tasks)
+        n = len(self.tail)
+        self.depot, self.depot_id = depot, n
+        starts = list(self.tail) + [depot]
+        # rows depend on the end vertex only: arcs ending at one vertex share a list
+        rows: Dict[int, List[int]] = {}
+        D: List[List[int]] = []
+        for v in list(self.head) + [depot]:
+            row = rows.get(v)
+            if row is None:
+                dv = dist[v]
+                row = rows[v] = [dv[s] for s in starts]
+            D.append(row)
+        self.D = D
+        self.depot_out = D[n]
+        self.depot_in = [row[n] for row in D]
+
+    def route_cost(self, rt: ArcRoute) -> int:
+        D, cost = self.D, self.cost
+        tot, cur = 0, self.depot_id
+        for a in rt:
+            tot += D[cur][a] + cost[a]
+            cur = a
+        return tot + D[cur][self.depot_id]
+
+    def orient(self, ids: Iterable[int]) -> ArcRoute:
+        """Serve each task id from the endpoint nearer to where the previous one ended."""
+        D, out, cur = self.D, [], self.depot_id
+        for t in ids:
+            row = D[cur]
+            cur = 2*t if row[2*t] <= row[2*t+1] else 2*t+1
+            out.append(cur)
+        return out
+
+    # ------------------------------------------------------------ conversion
+    def to_arcs(self, routes: List[Route]) -> List[ArcRoute]:
+        index = self.index
+        return [[index[a] for a in rt] for rt in routes]
+
+    def to_routes(self, routes: List[ArcRoute]) -> List[Route]:
+        tail, head = self.tail, self.head
+        return [[(tail[a], head[a]) for a in rt] for rt in routes]
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+#  Batch mode – solve a directory of instances on one shared pool
+# ------------------------------------------------------------
+#  python batch.py CARP/CARP_samples -t 10 -s 1 2 3 -o results.csv
+#
+#  Every (instance, seed) pair is one job on a single worker; all jobs share
+#  one spawn-context pool and each instance is loaded through the disk cache
+#  and published to shared memory once.  With --per-task the budget grows
+#  with the number of required edges, and jobs are submitted longest first
+#  (LPT) so the big instances start early and the small ones fill the gaps.
+#  Rows (instance, seed, cost, routes, wall) are written as jobs finish, as
+#  CSV or JSONL depending on the output suffix.
+import argparse, csv, glob, importlib, json, os, sys, time
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Tuple
+from cache import digest, load_instance
+from pathscan import STARTS
+from shm import Segments, run_attached
+from solution import Solution, TaskTable
+INF = 0x3f3f3f3f
+
+FIELDS = ("instance", "seed", "cost", "routes", "wall")
+
+def instances(paths: List[str]) -> List[str]:
+    """Expand directories (every *.dat inside) and glob patterns."""
+    out: List[str] = []
+    for p in paths:
+        if os.path.isdir(p):
+            out += sorted(glob.glob(os.path.join(p, "*.dat")))
+        else:
+            out += sorted(glob.glob(p)) or [p]
+    return list(dict.fromkeys(out))
+
+# ---------------------------------------------------------------- worker side
+def job(pid: int, tasks, dist, solver: str, depot: int, cap: int,
+        budget: float, seed: int, decoder: str,
+        start: str = "greedy") -> Tuple[int, str, float]:
+    """One solver run on one worker; returns (cost, s-line, wall seconds)."""
+    t0 = time.time()
+    best: list = [INF, None]
+    def keep(val, sol, _pid=0):
+        if val < best[0]:
+            best[:] = [val, sol]
+        return True
+    extra = () if solver == "ver2" else (decoder,)
+    importlib.import_module(solver).sa_worker(pid, tasks, dist, depot, cap,
+                                              budget, seed, keep, *extra,
+                                              start=start)
+    val, sol = best
+    if sol is None:
+        return INF, "", time.time() - t0
+    table = TaskTable(tasks)
+    if not isinstance(sol, Solution):           # ver2/ver3 keep route lists
+        sol = Solution.from_routes(sol, val, table)
+    return val, sol.text(table).split("\n")[0], time.time() - t0
+
+# ---------------------------------------------------------------- output
+class Sink:
+    """Row writer: JSONL for *.jsonl, CSV otherwise (stdout when no path)."""
+    def __init__(self, path: str = ""):
+        self.f = open(path, "w", newline="") if path else sys.stdout
+        self.jsonl = path.endswith(".jsonl")
+        if not self.jsonl:
+            self.w = csv.writer(self.f)
+            self.w.writerow(FIELDS)
+
+    def write(self, row: tuple):
+        if self.jsonl:
+            self.f.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+        else:
+            self.w.writerow(row)
+        self.f.flush()
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+# ---------------------------------------------------------------- main
+def main():
+    ap = argparse.ArgumentParser(description="solve many CARP instances on one pool")
+    ap.add_argument("paths", nargs="+", help="instance files, directories or globs")
+    ap.add_argument("-t","--termination", type=float, default=10.0,
+                    help="seconds per (instance, seed) job")
+    ap.add_argument("--per-task", type=float, default=0.0,
+                    help="extra seconds per required edge")
+    ap.add_argument("-s","--seeds", type=int, nargs="+", default=[1])
+    ap.add_argument("-w","--workers", type=int, default=0)
+    ap.add_argument("--solver", choices=("ver2", "ver3", "ver4", "tmp"), default="ver4")
+    ap.add_argument("--decoder", choices=("greedy", "split"), default="greedy")
+    ap.add_argument("--start", choices=STARTS, default="greedy",
+                    help="start constructor of the solver workers")
+    ap.add_argument("-o","--output", default="", help="results .csv or .jsonl (default: CSV to stdout)")
+    args = ap.parse_args()
+
+    files = instances(args.paths)
+    if not files:
+        sys.exit("no instances found")
+    workers = args.workers or os.cpu_count() or 1
+    ctx = get_context("spawn")
+    sink = Sink(args.output)
+    with Segments() as segs, ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        jobs, published = [], {}
+        for path in files:
+            key = digest(path)                  # identical copies share segments
+            if key not in published:
+                inst = load_instance(path)
+                published[key] = inst, segs.share(inst)
+            inst, shared = published[key]
+            budget = args.termination + args.per_task * len(inst.tasks())
+            jobs += [(budget, path, seed, inst, shared) for seed in args.seeds]
+        jobs.sort(key=lambda j: -j[0])          # LPT: longest first
+        futs = {}
+        for i, (budget, path, seed, inst, shared) in enumerate(jobs):
+            fut = pool.submit(run_attached, job, i, shared, args.solver, inst.depot,
+                              inst.capacity, budget, seed, args.decoder, args.start)
+            futs[fut] = (path, seed)
+        for fut in as_completed(futs):
+            path, seed = futs[fut]
+            val, routes, wall = fut.result()
+            sink.write((path, seed, val, routes, round(wall, 3)))
+    sink.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+#  Benchmark – every solver variant on the bundled instances
+# ------------------------------------------------------------
+#  python bench.py -t 1 5 -s 1 2 3 -w 1 4
+#  python bench.py --compare HEAD~1          # medians against an older commit
+#
+#  Each variant runs as its own process with fixed seeds over the -t budgets
+#  and worker counts; every answer is checked with legal.py's validator.
+#  Rows are appended to bench_results.jsonl tagged with the current commit,
+#  so a later run can be compared against any earlier one.
+#
+#  The pooled variants also write a convergence trace per run (under
+#  bench_traces/<commit>/); their time to best is the elapsed time of the
+#  last improvement, and --plot draws the traces (needs matplotlib).  For the
+#  legacy variants time to best is the smallest budget at which a run
+#  already reaches the cost it reaches at the largest budget.
+import argparse, glob, json, os, statistics, subprocess, sys, time
+from collections import defaultdict
+from typing import Dict, List, Optional
+import legal
+from telemetry import read_trace
+
+VARIANTS = ("CARP_solver", "ver1", "ver2", "ver3", "ver4", "tmp")
+POOLED = ("ver2", "ver3", "ver4", "tmp")         # accept -w/--workers
+RESULTS = "bench_results.jsonl"
+TRACES = "bench_traces"
+
+# best known solution values
+BKS: Dict[str, int] = {
+    "gdb1": 316, "gdb10": 275, "val1A": 173, "val4A": 400, "val7A": 279,
+    "egl-e1-A": 3548, "egl-s1-A": 5018,
+}
+
+def commit(rev: str = "HEAD") -> str:
+    """Short hash of rev (rev itself when git cannot resolve it)."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", rev], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return rev
+
+def check(inst_path: str, out: str):
+    """(cost, error) of one solver answer under legal.py's rules."""
+    inst = legal.parse_instance(inst_path)
+    try:
+        routes, q = legal.parse_solution_text(out)
+        calc = legal.calc_total_cost(routes, inst, legal.build_graph(inst))
+        return q, (None if calc == q else f"q mismatch: computed {calc}")
+    except ValueError as exc:
+        return None, str(exc)
+
+def run(variant: str, inst_path: str, budget: float, seed: int, workers: int,
+        trace_dir: str) -> dict:
+    name = os.path.splitext(os.path.basename(inst_path))[0]
+    cmd = [sys.executable, f"{variant}.py", inst_path, "-t", str(budget), "-s", str(seed)]
+    trace = None
+    if variant in POOLED:
+        if workers:
+            cmd += ["-w", str(workers)]
+        trace = os.path.join(trace_dir, f"{variant}_{name}_t{budget:g}_s{seed}_w{workers}.csv")
+        cmd += ["--trace", trace]
+    start = time.time()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    wall = time.time() - start
+    cost, error = check(inst_path, proc.stdout) if proc.returncode == 0 else \
+        (None, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed")
+    gap = (cost - BKS[name]) / BKS[name] if cost is not None and name in BKS else None
+    return {"variant": variant, "instance": name, "budget": budget, "seed": seed,
+            "workers": workers if variant in POOLED else 1, "cost": cost,
+            "gap": gap, "wall": round(wall, 3), "error": error, "trace": trace}
+
+# ---------------------------------------------------------------- report
+def time_to_best(rows: List[dict]):
+    """Fill row["ttb"]: last improvement in the trace, else budget sweep."""
+    runs = defaultdict(list)
+    for r in rows:
+        if r.get("trace") and os.path.exists(r["trace"]):
+            trace = read_trace(r["trace"])
+            r["ttb"] = trace[-1][0] if trace else None
+        else:
+            runs[r["variant"], r["instance"], r["seed"], r["workers"]].append(r)
+    for group in runs.values():
+        group.sort(key=lambda r: r["budget"])
+        final = group[-1]["cost"]
+        ttb = next((r["budget"] for r in group if r["cost"] is not None
+                    and final is not None and r["cost"] <= final), None)
+        for r in group:
+            r["ttb"] = ttb
+
+def summary(rows: List[dict]):
+    groups = defaultdict(list)
+    for r in rows:
+        groups[r["variant"], r["instance"], r["budget"], r["workers"]].append(r)
+    print(f"{'variant':<12}{'instance':<10}{'t':>6}{'w':>3}{'min':>7}{'med':>8}{'max':>7}"
+          f"{'gap%':>7}{'ttb':>7}{'wall':>7}{'bad':>4}")
+    for (v, inst, t, w), rs in sorted(groups.items()):
+        costs = [r["cost"] for r in rs if r["cost"] is not None]
+        gaps = [r["gap"] for r in rs if r["gap"] is not None]
+        ttbs = [r["ttb"] for r in rs if r.get("ttb") is not None]
+        bad = sum(r["error"] is not None for r in rs)
+        fmt = lambda x, width, spec="": f"{x:>{width}{spec}}" if x is not None else f"{'-':>{width}}"
+        print(f"{v:<12}{inst:<10}{t:>6g}{w:>3}"
+              f"{fmt(min(costs) if costs else None, 7)}"
+              f"{fmt(statistics.median(costs) if costs else None, 8, 'g')}"
+              f"{fmt(max(costs) if costs else None, 7)}"
+              f"{fmt(100 * statistics.mean(gaps) if gaps else None, 7, '.2f')}"
+              f"{fmt(statistics.median(ttbs) if ttbs else None, 7, '.2f')}"
+              f"{statistics.mean(r['wall'] for r in rs):>7.2f}{bad:>4}")
+
+def compare(rows: List[dict], old: List[dict]):
+    """Median cost / wall of each group against the same group in `old`."""
+    def medians(rs):
+        g = defaultdict(list)
+        for r in rs:
+            g[r["variant"], r["instance"], r["budget"], r["workers"]].append(r)
+        return {k: (statistics.median([r["cost"] for r in v if r["cost"] is not None] or [0]),
+                    statistics.median(r["wall"] for r in v)) for k, v in g.items()}
+    new_m, old_m = medians(rows), medians(old)
+    print(f"\n{'variant':<12}{'instance':<10}{'t':>6}{'w':>3}{'Δcost':>8}{'Δwall':>8}")
+    for k in sorted(new_m.keys() & old_m.keys()):
+        dc, dw = new_m[k][0] - old_m[k][0], new_m[k][1] - old_m[k][1]
+        flag = "  <-- regression" if dc > 0 else ""
+        print(f"{k[0]:<12}{k[1]:<10}{k[2]:>6g}{k[3]:>3}{dc:>+8g}{dw:>+8.2f}{flag}")
+
+def plot(rows: List[dict], path: str):
+    """Best cost over time, one panel per instance, one line per traced run."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("--plot needs matplotlib", file=sys.stderr)
+        return
+    traced = [r for r in rows if r.get("trace") and os.path.exists(r["trace"])]
+    names = sorted({r["instance"] for r in traced})
+    if not names:
+        return
+    fig, axes = plt.subplots(len(names), 1, figsize=(8, 3 * len(names)), squeeze=False)
+    for ax, name in zip(axes[:, 0], names):
+        for r in (r for r in traced if r["instance"] == name):
+            trace = read_trace(r["trace"])
+            if trace:
+                ts = [t for t, _, _ in trace] + [r["budget"]]
+                cs = [c for _, c, _ in trace] + [trace[-1][1]]
+                ax.step(ts, cs, where="post", label=f"{r['variant']} t={r['budget']:g} "
+                                                    f"s={r['seed']} w={r['workers']}")
+        if name in BKS:
+            ax.axhline(BKS[name], color="k", lw=0.5, ls="--")
+        ax.set_title(name)
+        ax.set_xlabel("seconds")
+        ax.set_ylabel("best cost")
+        ax.legend(fontsize="x-small")
+    fig.tight_layout()
+    fig.savefig(path)
+
+def stored(rev: Optional[str] = None) -> List[dict]:
+    if not os.path.exists(RESULTS):
+        return []
+    with open(RESULTS) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [r for r in rows if rev is None or r["commit"] == rev]
+
+# ---------------------------------------------------------------- main
+def main():
+    ap = argparse.ArgumentParser(description="benchmark the CARP solver variants")
+    ap.add_argument("instances", nargs="*", default=["CARP/CARP_samples"],
+                    help="instance files or directories")
+    ap.add_argument("-v","--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    ap.add_argument("-t","--budgets", type=float, nargs="+", default=[1.0, 5.0])
+    ap.add_argument("-s","--seeds", type=int, nargs="+", default=[1, 2, 3])
+    ap.add_argument("-w","--workers", type=int, nargs="+", default=[1],
+                    help="worker counts for the pooled variants")
+    ap.add_argument("--compare", metavar="REV", default=None,
+                    help="compare against rows stored for this commit")
+    ap.add_argument("--plot", metavar="PNG", default=None,
+                    help="plot the convergence traces (needs matplotlib)")
+    ap.add_argument("--no-store", action="store_true", help="do not append to " + RESULTS)
+    args = ap.parse_args()
+
+    files = []
+    for p in args.instances:
+        files += sorted(glob.glob(os.path.join(p, "*.dat"))) if os.path.isdir(p) else [p]
+
+    rev, stamp, rows = commit(), time.strftime("%Y-%m-%dT%H:%M:%S"), []
+    trace_dir = os.path.join(TRACES, rev)
+    os.makedirs(trace_dir, exist_ok=True)
+    for variant in args.variants:
+        for w in (args.workers if variant in POOLED else [1]):
+            for path in files:
+                for seed in args.seeds:
+                    for t in args.budgets:
+                        r = run(variant, path, t, seed, w, trace_dir)
+                        r.update(commit=rev, stamp=stamp)
+                        rows.append(r)
+                        print(f"{variant} {r['instance']} t={t:g} s={seed} w={w}: "
+                              f"{r['cost'] if r['error'] is None else r['error']}",
+                              file=sys.stderr)
+    time_to_best(rows)
+    summary(rows)
+    if args.plot:
+        plot(rows, args.plot)
+    if not args.no_store:
+        with open(RESULTS, "a") as f:
+            for r in rows:
+                f.write(json.dumps(r) + "\n")
+    if args.compare:
+        old = stored(commit(args.compare))
+        if old:
+            compare(rows, old)
+        else:
+            print(f"\nno stored results for {args.compare}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# ------------------------------------------------------------
+#  On-disk cache of preprocessed instances (parsed edges + APSP)
+# ------------------------------------------------------------
+#  <CARP_CACHE>/v<FORMAT>-<sha1 of the .dat bytes>/
+#      head.npy   [n, depot, vehicles, capacity]
+#      edges.npy  m x 4  (u, v, cost, demand)
+#      dist.npy   distance matrix (dense, or compact over keys)
+#      keys.npy   endpoint vertices of a compact matrix (sparse mode only)
+#  Hits are opened with np.load(mmap_mode='r'), so every process that reads
+#  the same instance shares the page cache instead of a private copy.
+#  CARP_CACHE=off disables the cache.  FORMAT versions the layout; a folder
+#  that does not load (corrupt or truncated) is removed and rebuilt.
+import hashlib, os, shutil, tempfile
+from typing import List, Optional, Tuple
+import numpy as np
+from apsp import distance_matrix, as_table
+from loader import load
+
+CACHE_DIR = os.environ.get(
+    "CARP_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".carp_cache"))
+FORMAT = 1          # bump whenever the files or their meaning change
+
+class Prepared:
+    """Parsed instance with its distance matrix (memory-mapped on a hit)."""
+    __slots__ = ("n", "depot", "vehicles", "capacity", "edges", "mat", "keys")
+
+    def __init__(self, head, edges: np.ndarray, mat: np.ndarray,
+                 keys: Optional[np.ndarray]):
+        self.n, self.depot, self.vehicles, self.capacity = (int(x) for x in head)
+        self.edges, self.mat, self.keys = edges, mat, keys
+
+    def tasks(self) -> List[Tuple[int,int,int,int]]:
+        """Required edges (demand > 0) in file order."""
+        return [tuple(r) for r in self.edges.tolist() if r[3] > 0]
+
+    def dist(self):
+        return as_table(self.mat, self.keys)
+
+def digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# ---------------------------------------------------------------- parse
+def _parse(path: str):
+    inst = load(path)
+    return (inst.n, inst.depot, inst.vehicles or 0, inst.capacity), inst.edges
+
+def _prepare(path: str) -> Prepared:
+    head, edges = _parse(path)
+    n, depot = head[0], head[1]
+    keys = [depot] + edges[edges[:, 3] > 0, :2].ravel().tolist()
+    mat, keys = distance_matrix(n, edges[:, :3].tolist(), keys)
+    return Prepared(head, edges, mat,
+                    None if keys is None else np.array(keys, dtype=np.int64))
+
+# ---------------------------------------------------------------- load / store
+def _load(folder: str) -> Optional[Prepared]:
+    try:
+        head = np.load(os.path.join(folder, "head.npy"))
+        edges = np.load(os.path.join(folder, "edges.npy"), mmap_mode="r")
+        mat = np.load(os.path.join(folder, "dist.npy"), mmap_mode="r")
+        keys_file = os.path.join(folder, "keys.npy")
+        keys = np.load(keys_file) if os.path.exists(keys_file) else None
+        return Prepared(head, edges, mat, keys)
+    except (OSError, ValueError, EOFError):
+        return None
+
+def _store(folder: str, prep: Prepared):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=CACHE_DIR)
+    try:
+        np.save(os.path.join(tmp, "head.npy"),
+                np.array([prep.n, prep.depot, prep.vehicles, prep.capacity], dtype=np.int64))
+        np.save(os.path.join(tmp, "edges.npy"), prep.edges)
+        np.save(os.path.join(tmp, "dist.npy"), prep.mat)
+        if prep.keys is not None:
+            np.save(os.path.join(tmp, "keys.npy"), prep.keys)
+        os.rename(tmp, folder)          # atomic publish; loses a race harmlessly
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def load_instance(path: str) -> Prepared:
+    """Preprocessed instance, from the cache when the file content is known."""
+    if CACHE_DIR == "off":
+        return _prepare(path)
+    folder = os.path.join(CACHE_DIR, f"v{FORMAT}-{digest(path)}")
+    hit = _load(folder)
+    if hit is not None:
+        return hit
+    if os.path.isdir(folder):           # unreadable: replace it, rename needs the name free
+        shutil.rmtree(folder, ignore_errors=True)
+    prep = _prepare(path)
+    _store(folder, prep)
+    return _load(folder) or prep
@@ -0,0 +1,91 @@
+# ------------------------------------------------------------
+#  Best-solution channel between workers and the coordinator
+# ------------------------------------------------------------
+#  A shared best cost plus one pipe.  Workers compare against the shared
+#  value first and only pickle + send a solution that is strictly better;
+#  the check and the send happen under the value's lock, so everything the
+#  coordinator receives is a new global best.  The coordinator blocks on
+#  the pipe instead of polling.  No manager process is involved.
+#
+#  The channel holds a synchronized Value, so it reaches pool workers by
+#  inheritance: ProcessPoolExecutor(initializer=install, initargs=(ch,)),
+#  after which workers report through the module-level `offer`.  The
+#  optional island.Islands inboxes travel the same way (`emigrate` /
+#  `immigrants`).
+import time
+from multiprocessing.connection import wait
+from typing import Any, Iterator, List, Optional, Tuple
+INF = 0x3f3f3f3f
+
+Message = Tuple[int, int, Any]        # (cost, worker id, solution)
+
+class BestChannel:
+    def __init__(self, ctx, islands=None):
+        self.best = ctx.Value('q', INF)
+        self._recv, self._send = ctx.Pipe(duplex=False)
+        self.islands = islands
+
+    def offer(self, val: int, sol: Any, pid: int = 0) -> bool:
+        """Send sol if val beats the global best; returns whether it was sent."""
+        if val >= self.best.value:              # cheap unlocked pre-check
+            return False
+        with self.best.get_lock():
+            if val >= self.best.value:
+                return False
+            self.best.value = val
+            self._send.send((val, pid, sol))
+        return True
+
+    def receive(self, deadline: float) -> Iterator[Message]:
+        """
+        Yield improvements as they arrive until `deadline` (time.time()),
+        then close the channel and yield whatever was still in flight.
+        """
+        while True:
+            left = deadline - time.time()
+            if left <= 0:
+                break
+            if wait([self._recv], left):
+                yield self._recv.recv()
+        yield from self.close()
+
+    def reset(self):
+        """Reopen a closed channel for the next job."""
+        self.best.value = INF
+
+    def close(self) -> List[Message]:
+        """
+        Stop accepting offers and return what is still in the pipe.  A worker
+        may be blocked in send while holding the lock, so keep draining
+        until the lock is ours.
+        """
+        pending: List[Message] = []
+        lock = self.best.get_lock()
+        while not lock.acquire(timeout=0.01):
+            while self._recv.poll():
+                pending.append(self._recv.recv())
+        try:
+            self.best.value = -1                # nothing beats a negative cost
+        finally:
+            lock.release()
+        while self._recv.poll():
+            pending.append(self._recv.recv())
+        return pending
+
+# ---------------------------------------------------------------- worker side
+_current: Optional[BestChannel] = None
+
+def install(ch: BestChannel):
+    global _current
+    _current = ch
+    if ch.islands is not None:
+        ch.islands.worker_side()
+
+def offer(val: int, sol: Any, pid: int = 0) -> bool:
+    return _current.offer(val, sol, pid)
+
+def emigrate(pid: int, migrants: List[Any]):
+    _current.islands.emigrate(pid, migrants)
+
+def immigrants(pid: int) -> List[Any]:
+    return _current.islands.immigrants(pid)
@@ -0,0 +1,105 @@
+# ------------------------------------------------------------
+#  Granular neighbourhood – moves only between nearby tasks
+# ------------------------------------------------------------
+#  Two tasks are near when some end of one is close to some end of the
+#  other, i.e. the cheapest of the four arc-to-arc deadheads D[a][b].  A
+#  granular move takes a random task and one of its k nearest tasks and
+#  either swaps them or reinserts the first right before / after the
+#  second, so the attempts land where an improvement is plausible instead
+#  of pairing tasks from opposite ends of the network.
+import random
+from typing import Dict, List, Tuple
+import numpy as np
+from arcs import ArcModel
+from moves import RouteState
+
+def granularity(spec: str) -> int:
+    """--granular K: 0 (off) or a positive neighbour count."""
+    k = int(spec)
+    if k < 0:
+        raise ValueError(f"granularity must be >= 0, got {k}")
+    return k
+
+def nearest(model: ArcModel, k: int) -> List[List[int]]:
+    """For every task id its k nearest other tasks, nearest first (ties by id)."""
+    T = len(model)
+    k = min(k, T - 1)
+    D = model.D
+    near: List[List[int]] = []
+    for t in range(T):
+        row = np.minimum(D[2*t][:2*T], D[2*t+1][:2*T]).reshape(T, 2).min(1)
+        row[t] = np.iinfo(row.dtype).max       # sorts last, so never kept
+        near.append(np.argsort(row, kind="stable")[:k].tolist())
+    return near
+
+class Granular:
+    """
+    Move generator over a RouteState.  where[t] tracks the (route, position)
+    of every task so a neighbour is found without scanning the routes.
+    flip=True also tries the reversed orientations on swaps; a relocated
+    task is always inserted in its cheaper orientation.
+    """
+    __slots__ = ("state", "near", "flip", "where")
+
+    def __init__(self, state: RouteState, near: List[List[int]], flip: bool=False):
+        self.state, self.near, self.flip = state, near, flip
+        self.where: Dict[int, Tuple[int,int]] = {}
+        for r in range(len(state.routes)):
+            self._index(r)
+
+    def _index(self, r: int):
+        where = self.where
+        for p, a in enumerate(self.state.routes[r]):
+            where[a >> 1] = (r, p)
+
+    def attempt(self, rng: random.Random) -> int:
+        """One random granular move: 1 applied, -1 capacity reject, 0 no gain."""
+        t = rng.randrange(len(self.near))
+        if not self.near[t]:
+            return 0
+        u = rng.choice(self.near[t])
+        r1, p1 = self.where[t]
+        r2, p2 = self.where[u]
+        if rng.random() < 0.5:
+            return self._swap(r1, p1, r2, p2)
+        return self._relocate(r1, p1, r2, p2)
+
+    def _swap(self, r1: int, p1: int, r2: int, p2: int) -> int:
+        state = self.state
+        if not state.swap_fits(r1, p1, r2, p2):
+            return -1
+        e1, e2 = state.routes[r2][p2], state.routes[r1][p1]
+        best, best_delta = None, 0
+        for a1 in ((e1, e1 ^ 1) if self.flip else (e1,)):
+            for a2 in ((e2, e2 ^ 1) if self.flip else (e2,)):
+                d1, d2 = state.swap_delta(r1, p1, a1, r2, p2, a2)
+                if d1 + d2 < best_delta:
+                    best, best_delta = (a1, a2, d1, d2), d1 + d2
+        if best is None:
+            return 0
+        a1, a2, d1, d2 = best
+        state.swap(r1, p1, a1, r2, p2, a2, d1, d2)
+        self.where[a1 >> 1], self.where[a2 >> 1] = (r1, p1), (r2, p2)
+        return 1
+
+    def _relocate(self, r1: int, p1: int, r2: int, p2: int) -> int:
+        state = self.state
+        if not state.relocate_fits(r1, p1, r2):
+            return -1
+        if r1 == r2 and p2 > p1:
+            p2 -= 1                       # the neighbour's index after the removal
+        a = state.routes[r1][p1]
+        best, best_delta = None, 0
+        for q in (p2, p2 + 1):            # right before / right after the neighbour
+            for arc in (a, a ^ 1):
+                d1, d2 = state.relocate_delta(r1, p1, r2, q, arc)
+                if d1 + d2 < best_delta:
+                    best, best_delta = (q, arc, d1, d2), d1 + d2
+        if best is None:
+            return 0
+        q, arc, d1, d2 = best
+        state.relocate(r1, p1, r2, q, arc, d1, d2)
+        self._index(r1)
+        if r2 != r1:
+            self._index(r2)
+        return 1
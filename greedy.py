@@ -0,0 +1,145 @@
+# ------------------------------------------------------------
+#  Nearest-task greedy over per-vertex sorted candidate lists
+# ------------------------------------------------------------
+import random
+from typing import Dict, Iterable, List, Optional
+from arcs import ArcModel, ArcRoute
+from pathscan import RULES, check_rule, tie_key
+INF = 0x3f3f3f3f
+
+class NearestIndex:
+    """
+    For every vertex a route can stand on (depot / task endpoints) the tasks
+    sorted by deadhead to their nearer end, read from the arc model's D rows.
+    A construction walks these lists from a per-vertex cursor, skipping
+    served tasks lazily, so picking the next task touches only the nearest
+    candidates instead of all of them.  Ties go to the task earliest in the
+    given order, as in the list scans.
+    """
+    __slots__ = ("model", "_keys", "_ids")
+
+    def __init__(self, model: ArcModel):
+        self.model = model
+        self._keys: Dict[int, List[int]] = {}
+        self._ids: Dict[int, List[int]] = {}
+
+    def _lists(self, p: int, v: int):
+        ids = self._ids.get(v)
+        if ids is None:
+            row = self.model.D[p]
+            near = sorted((min(row[2*t], row[2*t+1]), t) for t in range(len(self.model)))
+            self._keys[v] = [k for k, _ in near]
+            self._ids[v] = ids = [t for _, t in near]
+        return self._keys[v], ids
+
+    def build_arcs(self, order: Iterable[int], cap: int, skip: bool=True):
+        """
+        Greedy arc routes for the task ids in `order`.  skip=True takes the
+        nearest task that still fits (ver4); skip=False takes the nearest task
+        and closes the route when it does not fit (original builder).
+        Returns (arc routes, total_cost).
+        """
+        m = self.model
+        D, cost, demand, head = m.D, m.cost, m.demand, m.head
+        o, depot, T = m.depot_id, m.depot, len(m)
+        rank = [0] * T
+        for i, t in enumerate(order):
+            rank[t] = i
+        served = bytearray(T)
+        cursor: Dict[int, int] = {}
+        left = T
+        routes: List[ArcRoute] = []
+        total = 0
+        while left:
+            p, v, q = o, depot, cap
+            rt: ArcRoute = []
+            while left:
+                keys, ids = self._lists(p, v)
+                i, n = cursor.get(v, 0), len(ids)
+                while i < n and served[ids[i]]:
+                    i += 1
+                cursor[v] = i
+                best, best_key = -1, INF
+                while i < n:
+                    k = keys[i]
+                    if best >= 0 and k > best_key:
+                        break
+                    t = ids[i]
+                    if not served[t] and (not skip or demand[2*t] <= q):
+                        if best < 0 or rank[t] < rank[best]:
+                            best, best_key = t, k
+                    i += 1
+                if best < 0 or (skip and best_key >= INF):
+                    break
+                if demand[2*best] > q:
+                    break
+                row = D[p]
+                a = 2*best if row[2*best] <= row[2*best+1] else 2*best+1
+                total += row[a] + cost[a]
+                q -= demand[a]
+                p, v = a, head[a]
+                served[best] = 1
+                left -= 1
+                rt.append(a)
+            total += D[p][o]
+            if rt:
+                routes.append(rt)
+        return routes, total
+
+    def build(self, order: Iterable[int], cap: int, skip: bool=True):
+        """build_arcs with the routes as (u, v) pairs."""
+        routes, total = self.build_arcs(order, cap, skip)
+        return self.model.to_routes(routes), total
+
+    def path_scan(self, cap: int, rule: str,
+                  rng: Optional[random.Random] = None):
+        """
+        Path scanning over all tasks (see pathscan): the nearest fitting
+        task next, ties on that deadhead broken by `rule` ("random" draws one
+        of the five per decision from rng).  The ties are a run of the sorted
+        list, so a step reads only the nearest candidates.  Same routes as
+        pathscan.scan over range(T).  Returns (arc routes, total_cost).
+        """
+        check_rule(rule)
+        m = self.model
+        D, cost, demand, head = m.D, m.cost, m.demand, m.head
+        o, depot, T = m.depot_id, m.depot, len(m)
+        served = bytearray(T)
+        cursor: Dict[int, int] = {}
+        left = T
+        routes: List[ArcRoute] = []
+        total = 0
+        while left:
+            p, v, load = o, depot, 0
+            rt: ArcRoute = []
+            while left:
+                keys, ids = self._lists(p, v)
+                i, n = cursor.get(v, 0), len(ids)
+                while i < n and served[ids[i]]:
+                    i += 1
+                cursor[v] = i
+                row, best_d, ties = D[p], INF, []
+                while i < n:
+                    k = keys[i]
+                    if k > best_d:
+                        break
+                    t = ids[i]
+                    if not served[t] and load + demand[2*t] <= cap:
+                        best_d = k
+                        ties.extend(a for a in (2*t, 2*t+1) if row[a] == k)
+                    i += 1
+                if not ties:
+                    break
+                r = rng.choice(RULES) if rule == "random" else rule
+                a = min(ties, key=lambda a: tie_key(r, a, m, load, cap))
+                total += row[a] + cost[a]
+                load += demand[a]
+                p, v = a, head[a]
+                served[a >> 1] = 1
+                left -= 1
+                rt.append(a)
+            if not rt:
+                raise ValueError("task demand exceeds the vehicle capacity")
+            total += D[p][o]
+            routes.append(rt)
+        return routes, total
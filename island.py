@@ -0,0 +1,74 @@
+# ------------------------------------------------------------
+#  Island model – periodic migration of elite solutions
+# ------------------------------------------------------------
+#  Every worker is an island with its own inbox.  On each migration tick it
+#  sends its best few solutions to its neighbours (ring: the next island,
+#  star: the hub 0 to everyone and everyone to the hub).  An immigrant is
+#  restarted from, rather than a fresh shuffle: its giant tour is kicked
+#  with a few random exchanges, re-split and intensified.
+import queue, random
+from typing import Any, List, Tuple
+
+TOPOLOGIES = ("ring", "star")
+
+class Islands:
+    """Inboxes and topology; reaches the workers inside a BestChannel."""
+    def __init__(self, ctx, workers: int, topology: str = "ring"):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"unknown topology {topology!r}")
+        self.topology = topology
+        self.inboxes = [ctx.Queue() for _ in range(workers)]
+
+    def neighbours(self, pid: int) -> List[int]:
+        n = len(self.inboxes)
+        if n < 2:
+            return []
+        if self.topology == "ring":
+            return [(pid + 1) % n]
+        return list(range(1, n)) if pid == 0 else [0]
+
+    def worker_side(self):
+        # a worker must not hang at exit flushing migrants nobody reads
+        for box in self.inboxes:
+            box.cancel_join_thread()
+
+    def emigrate(self, pid: int, migrants: List[Any]):
+        for j in self.neighbours(pid):
+            self.inboxes[j].put(migrants)
+
+    def immigrants(self, pid: int) -> List[Any]:
+        out: List[Any] = []
+        box = self.inboxes[pid]
+        while True:
+            try:
+                out.extend(box.get_nowait())
+            except queue.Empty:
+                return out
+
+# ---------------------------------------------------------------- worker helpers
+class Elite:
+    """The best `size` distinct-cost solutions an island has seen."""
+    __slots__ = ("size", "items")
+
+    def __init__(self, size: int):
+        self.size, self.items = size, []
+
+    def add(self, val: int, sol: Any):
+        if any(v == val for v, _ in self.items):
+            return
+        self.items.append((val, sol))
+        self.items.sort(key=lambda it: it[0])
+        del self.items[self.size:]
+
+    def best(self) -> List[Tuple[int, Any]]:
+        return list(self.items)
+
+def kick(tour: List[Any], rng: random.Random, frac: float = 0.05) -> List[Any]:
+    """Giant tour with about frac * len random position exchanges."""
+    tour = list(tour)
+    if len(tour) < 2:
+        return tour
+    for _ in range(max(2, int(len(tour) * frac))):
+        i, j = rng.randrange(len(tour)), rng.randrange(len(tour))
+        tour[i], tour[j] = tour[j], tour[i]
+    return tour
@@ -1,111 +1,213 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+#  Solution validator
+# ------------------------------------------------------------
+#  python legal.py instance.dat solution.txt      (solution "-" = stdin)
+#
+#  Checks capacity, vehicle count, that every required edge is served exactly
+#  once, and that q matches the recomputed cost.  Edges are looked up in a
+#  dict index; deadheading is summed in one vectorised gather over the
+#  distance matrix.  On large sparse graphs only the depot and task endpoints
+#  get distance rows (Dijkstra), which is all a solution can deadhead between.
+import argparse, io, sys
 import numpy as np
-import re
+from apsp import distance_matrix
+import loader
 
 def parse_instance(filename):
-    with open(filename, 'r') as f:
-        lines = f.readlines()
-    info = {}
-    edges = []
-    for line in lines:
-        if ':' in line:
-            key, val = line.split(':', 1)
-            info[key.strip()] = val.strip()
-        elif line.strip().startswith('END'):
-            break
-        elif line.strip() and line[0].isdigit():
-            u, v, cost, demand = map(int, line.split())
-            edges.append({'u': u, 'v': v, 'cost': cost, 'demand': demand})
+    inst = loader.load(filename)
+    if inst.vehicles is None:
+        raise ValueError(f'{filename}: missing header VEHICLES')
+    rows = inst.edges.tolist()
+    # (u, v) and (v, u) -> (cost, demand)
+    index = {}
+    for u, v, z, d in rows:
+        index[(u, v)] = index[(v, u)] = (z, d)
     return {
-        'V': int(info['VERTICES']),
-        'depot': int(info['DEPOT']),
-        'vehicles': int(info['VEHICLES']),
-        'capacity': int(info['CAPACITY']),
-        'required': {(min(e['u'],e['v']),max(e['u'],e['v'])) for e in edges if e['demand']>0},
-        'edges': edges
+        'V': inst.n,
+        'depot': inst.depot,
+        'vehicles': inst.vehicles,
+        'capacity': inst.capacity,
+        'required': {(min(u, v), max(u, v)) for u, v, _, d in rows if d > 0},
+        'edges': rows,
+        'index': index,
     }
 
 def build_graph(instance):
-    V = instance['V']
-    INF = 10**9
-    cost = np.full((V+1, V+1), INF, dtype=int)
-    for e in instance['edges']:
-        u, v, c = e['u'], e['v'], e['cost']
-        cost[u,v] = cost[v,u] = min(cost[u,v], c)
-    for i in range(1, V+1):
-        cost[i,i] = 0
-    for k in range(1, V+1):
-        for i in range(1, V+1):
-            for j in range(1, V+1):
-                if cost[i,j] > cost[i,k] + cost[k,j]:
-                    cost[i,j] = cost[i,k] + cost[k,j]
-    return cost
+    """(mat, pos): distances between vertices a, b are mat[pos[a], pos[b]]; pos -1 = no row."""
+    keys = {instance['depot']} | {x for e in instance['required'] for x in e}
+    mat, keys = distance_matrix(instance['V'], [e[:3] for e in instance['edges']], keys)
+    if keys is None:
+        return mat, np.arange(instance['V'] + 1)
+    pos = np.full(instance['V'] + 1, -1, dtype=np.int64)
+    pos[keys] = np.arange(len(keys))
+    return mat, pos
+
+class SolutionReader:
+    """
+    Streaming s/q reader: iterating yields the s-line's routes one at a time,
+    reading the line in chunks, so memory is bounded by one route.  q and the
+    route count are known once the iteration is over.
+    """
+    def __init__(self, f, chunk: int = 1 << 16):
+        self.f, self.chunk = f, chunk
+        self.q = None
+        self.count = 0
+        self.lines = {'s': 0, 'q': 0}
+
+    def __iter__(self):
+        f, chunk = self.f, self.chunk
+        while True:
+            line = f.readline(chunk)
+            # enough of the line to tell what it is
+            while line and not line.endswith('\n') and len(line.lstrip()) < 2:
+                more = f.readline(chunk)
+                if not more:
+                    break
+                line += more
+            if not line:
+                break
+            head = line.lstrip()
+            if head.startswith('s '):
+                self.lines['s'] += 1
+                yield from self._routes(head[2:])
+                continue
+            is_q = head.startswith('q ')
+            while not line.endswith('\n'):     # finish the line; keep only a q-line
+                more = f.readline(chunk)
+                if not more:
+                    break
+                line = line + more if is_q else more
+            if is_q:
+                self.lines['q'] += 1
+                parts = line.split()
+                if len(parts) != 2 or not parts[1].lstrip('-').isdigit():
+                    raise ValueError(f'Bad q-line {line.strip()!r}')
+                self.q = int(parts[1])
+        if self.lines != {'s': 1, 'q': 1}:
+            raise ValueError('Require exactly one s‑line and one q‑line')
+
+    def _routes(self, buf):
+        # tokens between commas: "0" ends a route, "(u" and "v)" are a task
+        route, u = [], None
+        while True:
+            more = '' if buf.endswith('\n') else self.f.readline(self.chunk)
+            pieces = buf.split(',')
+            buf = pieces.pop() if more else ''   # last piece may be cut
+            for p in pieces if more else pieces + [buf]:
+                p = p.strip()
+                if not p:
+                    continue
+                if p[0] == '(':
+                    u = int(p[1:])
+                elif p[-1] == ')' and u is not None:
+                    route.append((u, int(p[:-1])))
+                    u = None
+                elif p == '0':
+                    if route:
+                        self.count += 1
+                        yield route
+                        route = []
+                else:
+                    raise ValueError(f'Bad token {p!r} in s-line')
+            if not more:
+                break
+            buf += more
+        if route:
+            self.count += 1
+            yield route
 
 def parse_solution(filename):
     with open(filename) as f:
-        lines = [l.strip() for l in f if l.strip()]
-    s_lines = [l for l in lines if l.startswith('s ')]
-    q_lines = [l for l in lines if l.startswith('q ')]
-    if len(s_lines) != 1 or len(q_lines) != 1:
-        raise ValueError('Require exactly one s‑line and one q‑line')
-    q_val = int(q_lines[0].split()[1])
-    raw = s_lines[0][2:]      # drop leading 's '
-    tokens = re.findall(r'\(\d+,\d+\)|0', raw)
-    routes = []
-    curr = []
-    for t in tokens:
-        if t == '0':
-            if curr:
-                routes.append(curr)
-                curr = []
-        else:
-            u, v = map(int, re.findall(r'\d+', t))
-            curr.append((u, v))
-    if curr:
-        routes.append(curr)
-    return routes, q_val
+        reader = SolutionReader(f)
+        return list(reader), reader.q
 
-def calc_total_cost(routes, instance, cost):
-    edge_cost = {}
-    for e in instance['edges']:
-        edge_cost[(e['u'],e['v'])] = edge_cost[(e['v'],e['u'])] = e['cost']
-    depot = instance['depot']
-    total = 0
-    served = set()
+def parse_solution_text(text):
+    reader = SolutionReader(io.StringIO(text))
+    return list(reader), reader.q
+
+def audit(routes, instance, cost):
+    """
+    (total, problems): the recomputed cost and every violation found, keyed
+    by kind (edge, capacity, vehicles, missing, extra, duplicate).  total is
+    None when an unknown edge makes the cost meaningless.  routes may be any
+    iterable, e.g. a SolutionReader; each route is checked as it arrives.
+    """
+    mat, pos = cost
+    index, depot = instance['index'], instance['depot']
+    problems = {}
+    total = deadhead = used = 0
+    served, dup = set(), set()
     for route in routes:
+        used += 1
         load = 0
         curr = depot
+        frm, to = [], []                  # deadhead legs of this route
         for u, v in route:
-            total += cost[curr, u]                 # deadheading
-            total += edge_cost[(u, v)]            # service
-            load += next(e['demand'] for e in instance['edges']
-                         if {e['u'], e['v']} == {u, v})
-            served.add((min(u, v), max(u, v)))
+            if (u, v) not in index:
+                problems.setdefault('edge', []).append(f'({u},{v}) is not an edge')
+                continue
+            z, d = index[(u, v)]
+            total += z                    # service
+            load += d
+            key = (min(u, v), max(u, v))
+            if key in served:
+                dup.add(key)
+            served.add(key)
+            frm.append(curr)
+            to.append(u)
             curr = v
-        total += cost[curr, depot]
+        frm.append(curr)
+        to.append(depot)
+        deadhead += int(mat[pos[frm], pos[to]].sum())
         if load > instance['capacity']:
-            raise ValueError(f'Route load {load} exceeds capacity')
-    if len(routes) > instance['vehicles']:
-        raise ValueError(f'Using {len(routes)} routes > available {instance["vehicles"]}')
-    if served != instance['required']:
-        miss = instance['required'] - served
-        dup  = served - instance['required']
-        raise ValueError(f'Missing tasks {miss}, extra {dup}')
+            problems.setdefault('capacity', []).append(f'Route load {load} exceeds capacity')
+    if used > instance['vehicles']:
+        problems['vehicles'] = [f'Using {used} routes > available {instance["vehicles"]}']
+    miss = instance['required'] - served
+    extra = served - instance['required']
+    if miss:
+        problems['missing'] = [f'Missing tasks {miss}']
+    if extra:
+        problems['extra'] = [f'Extra tasks {extra}']
+    if dup:
+        problems['duplicate'] = [f'Tasks served twice {dup}']
+    if 'edge' in problems or extra:
+        return None, problems             # legs may leave the distance rows
+    return total + deadhead, problems
+
+def calc_total_cost(routes, instance, cost):
+    total, problems = audit(routes, instance, cost)
+    for kind in ('edge', 'capacity', 'vehicles', 'missing', 'extra', 'duplicate'):
+        if kind in problems:
+            raise ValueError(problems[kind][0])
     return total
 
 def main():
-    inst_file = r'E:\U\Assignment\CS311\Project2\egl-s1-A.dat'
-    sol_file  = r'E:\U\Assignment\CS311\Project2\sample.txt'
+    ap = argparse.ArgumentParser(description="validate a CARP solution")
+    ap.add_argument("instance_file")
+    ap.add_argument("solution_file", help='solution text ("-" reads stdin)')
+    args = ap.parse_args()
 
-    inst   = parse_instance(inst_file)
+    inst   = parse_instance(args.instance_file)
     cost   = build_graph(inst)
-    routes, q_given = parse_solution(sol_file)
-    q_calc = calc_total_cost(routes, inst, cost)
+    f = sys.stdin if args.solution_file == '-' else open(args.solution_file)
+    reader = SolutionReader(f)
+    try:
+        q_calc = calc_total_cost(reader, inst, cost)
+    except ValueError as exc:
+        print(f'Illegal solution: {exc}')
+        sys.exit(1)
+    finally:
+        f.close()
+    q_given = reader.q
 
     if q_calc != q_given:
         print(f'q mismatch: computed {q_calc} vs given {q_given}')
+        sys.exit(1)
     else:
         print("Legal solution")
-        print(f"Routes used: {len(routes)}, Total cost: {q_calc}")
+        print(f"Routes used: {reader.count}, Total cost: {q_calc}")
 
 if __name__ == '__main__':
     main()
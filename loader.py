@@ -0,0 +1,104 @@
+# ------------------------------------------------------------
+#  Instance loader shared by every solver and the validator
+# ------------------------------------------------------------
+#  Header lines are "KEY : value" in any order; keys are matched by name
+#  (case, spacing and hyphen style ignored), so a reordered or extra header
+#  line no longer shifts the fields.  The edge block between the header and
+#  END is parsed in one np.fromstring call into an m x 4 int64 array.
+import re, warnings
+from typing import Dict, List, Tuple
+import numpy as np
+
+# normalised header key -> attribute
+KEYS = {
+    "NAME": "name",
+    "VERTICES": "n",
+    "DEPOT": "depot",
+    "REQUIRED EDGES": "required",
+    "NON-REQUIRED EDGES": "non_required",
+    "VEHICLES": "vehicles",
+    "CAPACITY": "capacity",
+    "TOTAL COST OF REQUIRED EDGES": "total_cost",
+}
+NEEDED = ("n", "depot", "capacity")
+END = re.compile(r"^\s*END", re.M)
+
+Task = Tuple[int,int,int,int]             # (u, v, cost, demand)
+
+def _key(raw: str) -> str:
+    raw = re.sub("[‐-―]", "-", raw)
+    return " ".join(raw.upper().replace(" - ", "-").split())
+
+class Instance:
+    """Header fields plus the edge block as typed columns."""
+    __slots__ = ("name", "n", "depot", "vehicles", "capacity", "required",
+                 "non_required", "total_cost", "edges")
+
+    def __init__(self, header: Dict[str, object], edges: np.ndarray):
+        for attr in KEYS.values():
+            setattr(self, attr, header.get(attr))
+        self.edges = edges                # m x 4 int64: u, v, cost, demand
+
+    # typed column views
+    @property
+    def u(self) -> np.ndarray:
+        return self.edges[:, 0]
+
+    @property
+    def v(self) -> np.ndarray:
+        return self.edges[:, 1]
+
+    @property
+    def cost(self) -> np.ndarray:
+        return self.edges[:, 2]
+
+    @property
+    def demand(self) -> np.ndarray:
+        return self.edges[:, 3]
+
+    def tasks(self) -> List[Task]:
+        """Required edges (demand > 0) in file order."""
+        return [tuple(r) for r in self.edges[self.edges[:, 3] > 0].tolist()]
+
+    def arcs(self) -> List[Tuple[int,int,int]]:
+        return self.edges[:, :3].tolist()
+
+def parse(text: str, name: str = "<instance>") -> Instance:
+    header: Dict[str, object] = {}
+    pos = 0
+    while pos < len(text):
+        end = text.find("\n", pos)
+        end = len(text) if end < 0 else end + 1
+        line = text[pos:end].strip()
+        if line[:1].isdigit():
+            break                         # first edge line
+        pos = end
+        if ":" in line:
+            key, val = line.split(":", 1)
+            attr = KEYS.get(_key(key))
+            if attr:
+                val = val.strip()
+                header[attr] = val if attr == "name" else int(val)
+    for attr in NEEDED:
+        if attr not in header:
+            raise ValueError(f"{name}: missing header {attr!r}")
+    stop = END.search(text, pos)
+    block = text[pos:stop.start() if stop else len(text)]
+    # a non-integer stops fromstring: it raises or, on older numpy, only warns
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", DeprecationWarning)
+        try:
+            flat = np.fromstring(block, dtype=np.int64, sep=" ")
+        except ValueError:
+            caught.append(None)
+    if caught or flat.size % 4:
+        raise ValueError(f"{name}: malformed edge block")
+    edges = flat.reshape(-1, 4)
+    m = header.get("required", 0) + header.get("non_required", 0)
+    if m and m != len(edges):
+        raise ValueError(f"{name}: header announces {m} edges, found {len(edges)}")
+    return Instance(header, edges)
+
+def load(path: str) -> Instance:
+    with open(path) as f:
+        return parse(f.read(), path)
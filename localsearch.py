@@ -0,0 +1,244 @@
+# ------------------------------------------------------------
+#  Local search – standard CARP moves with first / best descent
+# ------------------------------------------------------------
+#  Every operator prices its moves from the arcs around the touched
+#  positions and checks capacity against the cached route loads before any
+#  cost is computed:
+#    flip      serve one task the other way round
+#    relocate  move one task elsewhere, in either orientation
+#    double    move two consecutive tasks together, kept or reversed
+#    swap      exchange two tasks, best of the four orientation pairs
+#    2opt      reverse a segment of one route
+#    2opt*     exchange the tails of two routes, both reconnections
+#  The network is undirected, so a reversed segment keeps its inner
+#  deadheads (D[b^1][a^1] == D[a][b]) and only its two links change.
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from arcs import ArcModel, ArcRoute
+from moves import RouteState
+from telemetry import Counters
+
+OPERATORS = ("flip", "relocate", "double", "swap", "2opt", "2opt*")
+
+Move = Tuple[int, Callable, tuple]        # (delta, apply, its arguments)
+INF = float("inf")
+
+def operators(spec: str) -> Tuple[str, ...]:
+    """'all' or a comma list of OPERATORS (command-line form)."""
+    if spec == "all":
+        return OPERATORS
+    ops = tuple(op for op in spec.split(",") if op)
+    unknown = [op for op in ops if op not in OPERATORS]
+    if unknown or not ops:
+        raise ValueError(f"unknown operators {unknown}; choose from {', '.join(OPERATORS)}")
+    return ops
+
+def _reverse(state: RouteState, r: int, i: int, j: int):
+    rt = state.routes[r]
+    state.assign(r, rt[:i] + [a ^ 1 for a in reversed(rt[i:j+1])] + rt[j+1:])
+
+def _exchange(state: RouteState, r1: int, i: int, r2: int, j: int, crossed: bool):
+    rt1, rt2 = state.routes[r1], state.routes[r2]
+    if crossed:
+        state.assign(r1, rt1[:i] + [a ^ 1 for a in reversed(rt2[:j])])
+        state.assign(r2, [a ^ 1 for a in reversed(rt1[i:])] + rt2[j:])
+    else:
+        state.assign(r1, rt1[:i] + rt2[j:])
+        state.assign(r2, rt2[:j] + rt1[i:])
+
+class LocalSearch:
+    """
+    Descent over the enabled operators until no move improves.  best=False
+    applies the first improving move found (operators in the given order),
+    best=True scans them all and applies the steepest one.  With `near`
+    (granular.nearest lists) the relocate / double / swap / 2opt* moves are
+    only tried between a task and its near tasks.  The scans stop at the
+    run's deadline (time.time() seconds) and the descent returns the state
+    reached so far.
+    """
+    __slots__ = ("model", "cap", "ops", "best", "near", "where", "deadline")
+
+    def __init__(self, model: ArcModel, cap: int,
+                 ops: Sequence[str] = OPERATORS, best: bool = False,
+                 near: Optional[List[List[int]]] = None):
+        table = {"flip": self._flip, "relocate": self._relocate,
+                 "double": self._double, "swap": self._swap,
+                 "2opt": self._two_opt, "2opt*": self._two_opt_star}
+        self.model, self.cap, self.best, self.near = model, cap, best, near
+        self.ops = [table[op] for op in ops]
+        self.where: Dict[int, Tuple[int,int]] = {}
+        self.deadline = INF
+
+    def run(self, routes: List[ArcRoute],
+            stats: Optional[Counters] = None,
+            deadline: float = INF) -> Tuple[List[ArcRoute], int]:
+        state = RouteState(routes, self.model, self.cap)
+        applied = self.descend(state, deadline)
+        if stats is not None:
+            stats.accepted += applied
+        return state.snapshot(), state.total
+
+    def descend(self, state: RouteState, deadline: float = INF) -> int:
+        """
+        Apply improving moves to `state` until none is left or the deadline
+        passes; returns how many.  A move found before the deadline cut a
+        scan short is still applied.
+        """
+        self.deadline = deadline
+        applied = 0
+        while time.time() < deadline:
+            if self.near is not None:
+                self.where = {a >> 1: (r, p) for r, rt in enumerate(state.routes)
+                              for p, a in enumerate(rt)}
+            best: Optional[Move] = None
+            for op in self.ops:
+                for move in op(state):
+                    if best is None or move[0] < best[0]:
+                        best = move
+                    if not self.best:
+                        break
+                if best is not None and not self.best:
+                    break
+            if best is None:
+                break
+            _, apply, args = best
+            apply(*args)
+            applied += 1
+        return applied
+
+    # ------------------------------------------------------------ candidates
+    def _routes(self, state: RouteState) -> Iterator[int]:
+        """Route indices for the outer loop of a scan; ends at the deadline."""
+        for r in range(len(state.routes)):
+            if time.time() >= self.deadline:
+                return
+            yield r
+
+    def _tasks(self, state: RouteState) -> Iterator[Tuple[int,int,int]]:
+        for r in self._routes(state):
+            for p, a in enumerate(state.routes[r]):
+                yield r, p, a
+
+    def _targets(self, state: RouteState, r1: int, p1: int) -> Iterator[Tuple[int,int]]:
+        """Positions paired with (r1,p1): all later ones, or its near tasks'."""
+        if self.near is None:
+            routes = state.routes
+            for r2 in range(r1, len(routes)):
+                for p2 in range(p1 + 1 if r2 == r1 else 0, len(routes[r2])):
+                    yield r2, p2
+        else:
+            where = self.where
+            for u in self.near[state.routes[r1][p1] >> 1]:
+                yield where[u]
+
+    def _slots(self, state: RouteState, r1: int, p1: int, n: int) -> Iterator[Tuple[int,int]]:
+        """Insertion points (route, index after removing r1[p1:p1+n])."""
+        if self.near is None:
+            for r2, rt in enumerate(state.routes):
+                for q in range(len(rt) + 1 - (n if r2 == r1 else 0)):
+                    yield r2, q
+        else:
+            for r2, p2 in self._targets(state, r1, p1):
+                if r2 == r1:
+                    if p1 <= p2 < p1 + n:
+                        continue          # the neighbour is part of the segment
+                    if p2 > p1:
+                        p2 -= n
+                yield r2, p2              # right before the neighbour
+                yield r2, p2 + 1          # right after it
+
+    # ------------------------------------------------------------ operators
+    def _flip(self, state: RouteState) -> Iterator[Move]:
+        for r, p, a in self._tasks(state):
+            d = state.replace_delta(r, p, a ^ 1)
+            if d < 0:
+                yield d, state.replace, (r, p, a ^ 1, d)
+
+    def _insertions(self, state: RouteState, n: int) -> Iterator[Move]:
+        for r1, p1, a in self._tasks(state):
+            rt = state.routes[r1]
+            if p1 + n > len(rt):
+                continue
+            segs = [(a,), (a ^ 1,)] if n == 1 else [(a, rt[p1+1]), (rt[p1+1] ^ 1, a ^ 1)]
+            for r2, q in self._slots(state, r1, p1, n):
+                if not state.move_fits(r1, p1, n, r2):
+                    continue
+                for seg in segs:
+                    d1, d2 = state.move_delta(r1, p1, n, r2, q, seg)
+                    if d1 + d2 < 0:
+                        yield d1 + d2, state.move, (r1, p1, n, r2, q, seg, d1, d2)
+
+    def _relocate(self, state: RouteState) -> Iterator[Move]:
+        return self._insertions(state, 1)
+
+    def _double(self, state: RouteState) -> Iterator[Move]:
+        return self._insertions(state, 2)
+
+    def _swap(self, state: RouteState) -> Iterator[Move]:
+        routes = state.routes
+        for r1, p1, e2 in self._tasks(state):
+            for r2, p2 in self._targets(state, r1, p1):
+                if not state.swap_fits(r1, p1, r2, p2):
+                    continue
+                e1 = routes[r2][p2]
+                for a1 in (e1, e1 ^ 1):
+                    for a2 in (e2, e2 ^ 1):
+                        d1, d2 = state.swap_delta(r1, p1, a1, r2, p2, a2)
+                        if d1 + d2 < 0:
+                            yield d1 + d2, state.swap, (r1, p1, a1, r2, p2, a2, d1, d2)
+
+    def _two_opt(self, state: RouteState) -> Iterator[Move]:
+        D, o = state.D, state.depot_id
+        for r in self._routes(state):
+            rt = state.routes[r]
+            n = len(rt)
+            for i in range(n):
+                prev = rt[i-1] if i else o
+                for j in range(i + 1, n):
+                    nxt = rt[j+1] if j+1 < n else o
+                    d = (D[prev][rt[j] ^ 1] + D[rt[i] ^ 1][nxt]
+                         - D[prev][rt[i]] - D[rt[j]][nxt])
+                    if d < 0:
+                        yield d, _reverse, (state, r, i, j)
+
+    def _two_opt_star(self, state: RouteState) -> Iterator[Move]:
+        """Cut r1 before index i and r2 before index j, then reconnect."""
+        routes, load, cap = state.routes, state.load, self.cap
+        D, dm, o = state.D, state.demand, state.depot_id
+        rev = lambda a: a if a == o else a ^ 1
+        pre: Dict[int, List[int]] = {}
+        def prefix(r):
+            if r not in pre:
+                acc = [0]
+                for a in routes[r]:
+                    acc.append(acc[-1] + dm[a])
+                pre[r] = acc
+            return pre[r]
+        if self.near is None:
+            cuts = ((r1, i, r2, j) for r1 in self._routes(state)
+                     for r2 in range(r1 + 1, len(routes))
+                     for i in range(len(routes[r1]) + 1)
+                     for j in range(len(routes[r2]) + 1))
+        else:
+            # link a task to a near task of another route, either way round
+            cuts = ((r1, p1 + 1, r2, p2 + k) for r1, p1, _ in self._tasks(state)
+                    for r2, p2 in self._targets(state, r1, p1) if r2 != r1
+                    for k in (0, 1))
+        for r1, i, r2, j in cuts:
+            rt1, rt2 = routes[r1], routes[r2]
+            a1 = rt1[i-1] if i else o
+            b1 = rt1[i] if i < len(rt1) else o
+            a2 = rt2[j-1] if j else o
+            b2 = rt2[j] if j < len(rt2) else o
+            old = D[a1][b1] + D[a2][b2]
+            q1, q2 = prefix(r1)[i], prefix(r2)[j]
+            # A1 + B2 / A2 + B1
+            if q1 + load[r2] - q2 <= cap and q2 + load[r1] - q1 <= cap:
+                d = D[a1][b2] + D[a2][b1] - old
+                if d < 0:
+                    yield d, _exchange, (state, r1, i, r2, j, False)
+            # A1 + reversed A2 / reversed B1 + B2
+            if q1 + q2 <= cap and load[r1] - q1 + load[r2] - q2 <= cap:
+                d = D[a1][rev(a2)] + D[rev(b1)][b2] - old
+                if d < 0:
+                    yield d, _exchange, (state, r1, i, r2, j, True)
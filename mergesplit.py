@@ -0,0 +1,59 @@
+# ------------------------------------------------------------
+#  Merge-Split – rebuild a few routes, keep the rest
+# ------------------------------------------------------------
+#  p routes of a solution are merged into one task set, re-ordered by path
+#  scanning under each tie-breaking rule, and every resulting giant tour is
+#  cut back into routes by the optimal split; the cheapest rebuild replaces
+#  the p routes.  A step samples several route subsets and keeps the best.
+import random
+from typing import List, Tuple
+from arcs import ArcModel, ArcRoute
+from pathscan import RULES, scan
+from split import giant_tour, split
+
+PATIENCE = 5        # steps without improving the incumbent before a restart
+
+class MergeSplit:
+    __slots__ = ("model", "cap", "p", "samples")
+
+    def __init__(self, model: ArcModel, cap: int, p: int = 2, samples: int = 8):
+        self.model, self.cap, self.p, self.samples = model, cap, p, samples
+
+    def rebuild(self, routes: List[ArcRoute]) -> Tuple[List[ArcRoute], int]:
+        """Best path-scanning + split rebuild of the tasks in `routes`."""
+        tasks = [a >> 1 for rt in routes for a in rt]
+        best, best_val = routes, sum(self.model.route_cost(rt) for rt in routes)
+        for rule in RULES:
+            ordered, _ = scan(self.model, self.cap, tasks, rule)
+            new, val = split(giant_tour(ordered), self.model, self.cap)
+            if val < best_val:
+                best, best_val = new, val
+        return best, best_val
+
+    def step(self, routes: List[ArcRoute], rng: random.Random) -> Tuple[List[ArcRoute], int]:
+        """
+        Sample route subsets and apply the rebuild with the largest saving.
+        Returns (routes, total_cost); the routes are unchanged when no
+        sampled rebuild is cheaper.
+        """
+        cost = [self.model.route_cost(rt) for rt in routes]
+        total = sum(cost)
+        p = min(self.p, len(routes))
+        if p < 2:
+            return routes, total
+        best, best_gain = None, 0
+        seen = set()
+        for _ in range(self.samples):
+            subset = tuple(sorted(rng.sample(range(len(routes)), p)))
+            if subset in seen:
+                continue
+            seen.add(subset)
+            new, val = self.rebuild([routes[r] for r in subset])
+            gain = val - sum(cost[r] for r in subset)
+            if gain < best_gain:
+                best, best_gain = (subset, new), gain
+        if best is None:
+            return routes, total
+        subset, new = best
+        kept = [rt for r, rt in enumerate(routes) if r not in subset]
+        return kept + new, total + best_gain
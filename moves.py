@@ -0,0 +1,152 @@
+# ------------------------------------------------------------
+#  Move evaluation engine – O(1) delta costs for swap / flip / relocate
+# ------------------------------------------------------------
+from typing import List, Sequence, Tuple
+from arcs import ArcModel, ArcRoute
+
+class RouteState:
+    """
+    Mutable arc routes (see arcs.ArcModel) with cached per-route load and
+    cost.  A move is priced from the arcs around the touched positions only;
+    the routes are changed in place when the caller accepts it.
+    """
+    __slots__ = ("D", "arc_cost", "demand", "depot_id", "cap",
+                 "routes", "load", "cost", "total")
+
+    def __init__(self, routes: List[ArcRoute], model: ArcModel, cap: int):
+        self.D, self.arc_cost, self.demand = model.D, model.cost, model.demand
+        self.depot_id, self.cap = model.depot_id, cap
+        self.routes = [list(rt) for rt in routes]
+        self.load = [sum(self.demand[a] for a in rt) for rt in self.routes]
+        self.cost = [model.route_cost(rt) for rt in self.routes]
+        self.total = sum(self.cost)
+
+    # ------------------------------------------------------------ deltas
+    def replace_delta(self, r: int, p: int, arc: int) -> int:
+        """Cost change of route r when position p is served as `arc`."""
+        rt, D, c = self.routes[r], self.D, self.arc_cost
+        prev = rt[p-1] if p else self.depot_id
+        nxt = rt[p+1] if p+1 < len(rt) else self.depot_id
+        old = rt[p]
+        return (D[prev][arc] + c[arc] + D[arc][nxt]
+                - D[prev][old] - c[old] - D[old][nxt])
+
+    def swap_delta(self, r1: int, p1: int, a1: int,
+                   r2: int, p2: int, a2: int) -> Tuple[int,int]:
+        """Per-route cost change of serving a1 at (r1,p1) and a2 at (r2,p2)."""
+        if r1 != r2:
+            return self.replace_delta(r1, p1, a1), self.replace_delta(r2, p2, a2)
+        if p1 > p2:
+            p1, p2, a1, a2 = p2, p1, a2, a1
+        if p2 - p1 > 1:
+            return self.replace_delta(r1, p1, a1) + self.replace_delta(r1, p2, a2), 0
+        # adjacent positions share the link between them
+        rt, D, c = self.routes[r1], self.D, self.arc_cost
+        prev = rt[p1-1] if p1 else self.depot_id
+        nxt = rt[p2+1] if p2+1 < len(rt) else self.depot_id
+        o1, o2 = rt[p1], rt[p2]
+        new = D[prev][a1] + c[a1] + D[a1][a2] + c[a2] + D[a2][nxt]
+        old = D[prev][o1] + c[o1] + D[o1][o2] + c[o2] + D[o2][nxt]
+        return new - old, 0
+
+    def swap_fits(self, r1: int, p1: int, r2: int, p2: int) -> bool:
+        """Capacity check for exchanging the tasks at (r1,p1) and (r2,p2)."""
+        if r1 == r2:
+            return True
+        dm = self.demand
+        d1, d2 = dm[self.routes[r1][p1]], dm[self.routes[r2][p2]]
+        return (self.load[r1] - d1 + d2 <= self.cap and
+                self.load[r2] - d2 + d1 <= self.cap)
+
+    def move_delta(self, r1: int, p1: int, n: int, r2: int, p2: int,
+                   seg: Sequence[int]) -> Tuple[int,int]:
+        """
+        Per-route cost change of taking the n tasks at r1[p1:p1+n] out and
+        serving them as the arcs `seg` before position p2 of route r2 (p2
+        counted after the removal).  n=1 is a relocation, n=2 a double one.
+        """
+        rt, D, c, o = self.routes[r1], self.D, self.arc_cost, self.depot_id
+        prev = rt[p1-1] if p1 else o
+        nxt = rt[p1+n] if p1+n < len(rt) else o
+        d1 = D[prev][nxt] - D[prev][rt[p1]] - D[rt[p1+n-1]][nxt] - self._inner(rt[p1:p1+n])
+        dst = self.routes[r2] if r1 != r2 else rt[:p1] + rt[p1+n:]
+        prev = dst[p2-1] if p2 else o
+        nxt = dst[p2] if p2 < len(dst) else o
+        d2 = D[prev][seg[0]] + D[seg[-1]][nxt] - D[prev][nxt] + self._inner(seg)
+        return (d1, d2) if r1 != r2 else (d1 + d2, 0)
+
+    def move_fits(self, r1: int, p1: int, n: int, r2: int) -> bool:
+        """Capacity check for moving the tasks r1[p1:p1+n] into route r2."""
+        if r1 == r2:
+            return True
+        dm = self.demand
+        return self.load[r2] + sum(dm[a] for a in self.routes[r1][p1:p1+n]) <= self.cap
+
+    def relocate_delta(self, r1: int, p1: int, r2: int, p2: int,
+                       arc: int) -> Tuple[int,int]:
+        """move_delta for the single task at (r1,p1) served as `arc`."""
+        return self.move_delta(r1, p1, 1, r2, p2, (arc,))
+
+    def relocate_fits(self, r1: int, p1: int, r2: int) -> bool:
+        return self.move_fits(r1, p1, 1, r2)
+
+    def _inner(self, seg: Sequence[int]) -> int:
+        """Service cost of seg plus the deadheads between its arcs."""
+        D, c = self.D, self.arc_cost
+        tot = c[seg[0]]
+        for a, b in zip(seg, seg[1:]):
+            tot += D[a][b] + c[b]
+        return tot
+
+    # ------------------------------------------------------------ apply
+    def replace(self, r: int, p: int, arc: int, delta: int):
+        rt = self.routes[r]
+        self.load[r] += self.demand[arc] - self.demand[rt[p]]
+        rt[p] = arc
+        self.cost[r] += delta
+        self.total += delta
+
+    def swap(self, r1: int, p1: int, a1: int,
+             r2: int, p2: int, a2: int, d1: int, d2: int):
+        dm = self.demand
+        if r1 != r2:
+            self.load[r1] += dm[a1] - dm[self.routes[r1][p1]]
+            self.load[r2] += dm[a2] - dm[self.routes[r2][p2]]
+        self.routes[r1][p1] = a1
+        self.routes[r2][p2] = a2
+        self.cost[r1] += d1
+        self.cost[r2] += d2
+        self.total += d1 + d2
+
+    def move(self, r1: int, p1: int, n: int, r2: int, p2: int,
+             seg: Sequence[int], d1: int, d2: int):
+        src = self.routes[r1]
+        dm = self.demand
+        self.load[r1] -= sum(dm[a] for a in src[p1:p1+n])
+        del src[p1:p1+n]
+        self.routes[r2][p2:p2] = seg
+        self.load[r2] += sum(dm[a] for a in seg)
+        self.cost[r1] += d1
+        self.cost[r2] += d2
+        self.total += d1 + d2
+
+    def relocate(self, r1: int, p1: int, r2: int, p2: int,
+                 arc: int, d1: int, d2: int):
+        self.move(r1, p1, 1, r2, p2, (arc,), d1, d2)
+
+    def assign(self, r: int, rt: ArcRoute):
+        """Replace route r wholesale (reversals, tail exchanges), repricing it."""
+        D, c, o = self.D, self.arc_cost, self.depot_id
+        cost, cur = 0, o
+        for a in rt:
+            cost += D[cur][a] + c[a]
+            cur = a
+        cost += D[cur][o]
+        self.routes[r] = rt
+        self.load[r] = sum(self.demand[a] for a in rt)
+        self.total += cost - self.cost[r]
+        self.cost[r] = cost
+
+    def snapshot(self) -> List[ArcRoute]:
+        # relocations can empty a route; it is simply not driven
+        return [list(rt) for rt in self.routes if rt]
@@ -0,0 +1,76 @@
+# ------------------------------------------------------------
+#  Path scanning – nearest task next, ties broken by a rule
+# ------------------------------------------------------------
+#  A route grows from the depot by the task whose nearer end is closest to
+#  where the vehicle stands, among those that still fit.  Ties on that
+#  deadhead are broken by one of the classic rules:
+#    far        maximise the distance from the task back to the depot
+#    near       minimise it
+#    max_ratio  maximise demand / service cost
+#    min_ratio  minimise it
+#    half_full  far while the vehicle is less than half full, else near
+#    random     one of the five above, drawn afresh at every decision
+#  When nothing fits the vehicle returns to the depot.  scan() works on any
+#  task subset (merge-split); full constructions over all tasks go through
+#  greedy.NearestIndex.path_scan, which finds the ties on sorted lists.
+import random
+from typing import Iterable, List, Optional, Tuple
+from arcs import ArcModel, ArcRoute
+INF = 0x3f3f3f3f
+
+RULES = ("far", "near", "max_ratio", "min_ratio", "half_full")
+STARTS = ("greedy",) + RULES + ("random",)   # --start choices of the solvers
+
+def check_rule(rule: str) -> str:
+    """Reject anything but a rule name or "random" before a scan starts."""
+    if rule not in RULES and rule != "random":
+        raise ValueError(f"unknown path-scanning rule {rule!r}")
+    return rule
+
+def tie_key(rule: str, a: int, model: ArcModel, load: int, cap: int) -> float:
+    """Smaller is preferred."""
+    if rule == "half_full":
+        rule = "far" if 2 * load < cap else "near"
+    if rule == "far":
+        return -model.depot_in[a]
+    if rule == "near":
+        return model.depot_in[a]
+    ratio = model.demand[a] / model.cost[a] if model.cost[a] else INF
+    return -ratio if rule == "max_ratio" else ratio
+
+def scan(model: ArcModel, cap: int, tasks: Iterable[int], rule: str,
+         rng: Optional[random.Random] = None) -> Tuple[List[ArcRoute], int]:
+    """Path-scanning routes over the given task ids. Returns (arc routes, total_cost)."""
+    check_rule(rule)
+    D, cost, demand, o = model.D, model.cost, model.demand, model.depot_id
+    left = list(tasks)
+    routes: List[ArcRoute] = []
+    total = 0
+    while left:
+        cur, load, rt = o, 0, []
+        while True:
+            row = D[cur]
+            best_d, ties = INF, []
+            for i, t in enumerate(left):
+                if load + demand[2*t] > cap:
+                    continue
+                for a in (2*t, 2*t+1):
+                    d = row[a]
+                    if d < best_d:
+                        best_d, ties = d, [(i, a)]
+                    elif d == best_d:
+                        ties.append((i, a))
+            if not ties:
+                break
+            r = rng.choice(RULES) if rule == "random" else rule
+            i, a = min(ties, key=lambda c: tie_key(r, c[1], model, load, cap))
+            left.pop(i)
+            total += best_d + cost[a]
+            load += demand[a]
+            rt.append(a)
+            cur = a
+        if not rt:
+            raise ValueError("task demand exceeds the vehicle capacity")
+        total += D[cur][o]
+        routes.append(rt)
+    return routes, total
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+#  Warm solver daemon – resident worker pool behind a local socket
+# ------------------------------------------------------------
+#  serve:   python server.py serve [--socket PATH | --port N] [--solver ver4]
+#  submit:  python server.py submit instance.dat -t 5 -s 1
+#
+#  One request is one JSON line {"instance", "termination", "seed",
+#  "decoder", "start"}; the reply is the usual "s ...\nq ..." text (or "error: ...").
+#  Workers are spawned once and stay warm; each instance is loaded through
+#  the disk cache and published to shared memory once, so a job only pays
+#  for the socket round trip and the search itself.  Jobs run one at a time
+#  and each uses every worker.
+import argparse, importlib, json, os, signal, socket, sys, time
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor, wait
+from functools import partial
+from typing import Dict, Tuple
+from cache import Prepared, digest, load_instance
+from channel import BestChannel, install, offer
+from arcs import ArcModel
+from greedy import NearestIndex
+from pathscan import STARTS
+from shm import Segments, SharedInstance, run_attached
+from solution import Solution, TaskTable
+INF = 0x3f3f3f3f
+
+DEFAULT_SOCKET = "/tmp/carp-solver.sock"
+MARGIN = 0.05                   # reply this long before the budget runs out
+DECODERS = ("greedy", "split")
+
+# ---------------------------------------------------------------- server
+class SolverDaemon:
+    def __init__(self, solver: str = "ver4", workers: int = 0):
+        self.solver = importlib.import_module(solver)
+        self.workers = workers or os.cpu_count() or 1
+        self.ctx = get_context("spawn")
+        self.ch = BestChannel(self.ctx)
+        self.segs = Segments()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self.ctx,
+                                        initializer=install, initargs=(self.ch,))
+        self.published: Dict[str, Tuple[Prepared, SharedInstance, TaskTable]] = {}
+        self.running = []
+        # spawn every worker now rather than on the first job
+        wait([self.pool.submit(time.sleep, 0) for _ in range(self.workers)])
+
+    def _instance(self, path: str):
+        key = digest(path)
+        if key not in self.published:
+            inst = load_instance(path)
+            self.published[key] = (inst, self.segs.share(inst), TaskTable(inst.tasks()))
+        return self.published[key]
+
+    def solve(self, path: str, termination: float, seed: int,
+              decoder: str = "greedy", constructor: str = "greedy") -> str:
+        start = time.time()
+        # the previous job's workers must be done before the channel reopens
+        wait(self.running)
+        inst, shared, table = self._instance(path)
+        self.ch.reset()
+        per_worker = max(termination - 2 * MARGIN, 0.01)
+        worker = partial(self.solver.sa_worker, start=constructor)
+        self.running = [
+            self.pool.submit(run_attached, worker, i, shared,
+                             inst.depot, inst.capacity, per_worker,
+                             seed + 10007 * i, offer, decoder)
+            for i in range(self.workers)]
+        best_val, best_sol = INF, None
+        for val, _, sol in self.ch.receive(start + termination - MARGIN):
+            if val < best_val:
+                best_val, best_sol = val, sol
+        # a failed worker is an error, not an empty answer for the fallback
+        wait(self.running)
+        for f in self.running:
+            if f.exception() is not None:
+                raise RuntimeError(f"worker failed: {f.exception()}")
+        if best_sol is None:
+            best_sol, best_val = NearestIndex(
+                ArcModel(inst.tasks(), inst.dist(), inst.depot)).build(
+                range(len(table)), inst.capacity)
+        if not isinstance(best_sol, Solution):      # ver3 workers send routes
+            best_sol = Solution.from_routes(best_sol, best_val, table)
+        return best_sol.text(table)
+
+    def handle(self, conn: socket.socket):
+        with conn, conn.makefile("rwb") as f:
+            try:
+                req = json.loads(f.readline())
+                decoder, start = req.get("decoder", "greedy"), req.get("start", "greedy")
+                if decoder not in DECODERS:
+                    raise ValueError(f"unknown decoder {decoder!r}")
+                if start not in STARTS:
+                    raise ValueError(f"unknown start {start!r}")
+                reply = self.solve(req["instance"], float(req.get("termination", 30.0)),
+                                   int(req.get("seed", 1)), decoder, start)
+            except Exception as exc:            # report, keep serving
+                reply = f"error: {exc}"
+            f.write(reply.encode() + b"\n")
+            f.flush()
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.segs.close()
+
+def listen(path: str, port: int) -> socket.socket:
+    if port:
+        srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        srv.bind(("127.0.0.1", port))
+    else:
+        if os.path.exists(path):
+            os.unlink(path)
+        srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        srv.bind(path)
+    srv.listen()
+    return srv
+
+def serve(args):
+    daemon = SolverDaemon(args.solver, args.workers)
+    srv = listen(args.socket, args.port)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"serving {args.solver} with {daemon.workers} workers on "
+          f"{'127.0.0.1:%d' % args.port if args.port else args.socket}",
+          file=sys.stderr, flush=True)
+    try:
+        while True:
+            conn, _ = srv.accept()
+            daemon.handle(conn)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.close()
+        if not args.port and os.path.exists(args.socket):
+            os.unlink(args.socket)
+        daemon.close()
+
+# ---------------------------------------------------------------- client
+def submit(args):
+    if args.port:
+        conn = socket.create_connection(("127.0.0.1", args.port))
+    else:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(args.socket)
+    req = {"instance": os.path.abspath(args.instance_file),
+           "termination": args.termination, "seed": args.seed,
+           "decoder": args.decoder, "start": args.start}
+    with conn, conn.makefile("rwb") as f:
+        f.write(json.dumps(req).encode() + b"\n")
+        f.flush()
+        reply = f.read().decode().rstrip("\n")
+    print(reply)
+    if reply.startswith("error:"):
+        sys.exit(1)
+
+# ---------------------------------------------------------------- main
+def main():
+    ap = argparse.ArgumentParser(description="warm CARP solver daemon")
+    ap.add_argument("--socket", default=DEFAULT_SOCKET, help="unix socket path")
+    ap.add_argument("--port", type=int, default=0, help="local TCP port instead of a socket")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("serve")
+    sp.add_argument("--solver", choices=("ver3", "ver4", "tmp"), default="ver4",
+                    help="solver module whose sa_worker runs the jobs")
+    sp.add_argument("-w", "--workers", type=int, default=0)
+    sp.set_defaults(func=serve)
+
+    cp = sub.add_parser("submit")
+    cp.add_argument("instance_file")
+    cp.add_argument("-t","--termination", type=float, default=30.0)
+    cp.add_argument("-s","--seed", type=int, default=1)
+    cp.add_argument("--decoder", choices=DECODERS, default="greedy")
+    cp.add_argument("--start", choices=STARTS, default="greedy")
+    cp.set_defaults(func=submit)
+
+    args = ap.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
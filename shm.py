@@ -0,0 +1,126 @@
+# ------------------------------------------------------------
+#  Shared-memory publishing of task / distance arrays for workers
+# ------------------------------------------------------------
+#  The coordinator copies each array once into a SharedMemory segment and
+#  hands workers a small picklable SharedInstance.  Workers attach by name
+#  and read the distance matrix through per-row memoryviews, so dist[a][b]
+#  works without any copy.  Segments are unlinked when the Segments owner
+#  exits (normally, on an exception or at interpreter exit); if the
+#  coordinator is killed outright the multiprocessing resource tracker
+#  unlinks them.
+import atexit, os, threading, time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+Handle = Tuple[str, Tuple[int,...], str]      # (segment name, shape, dtype)
+
+_ATTACHED: Dict[str, shared_memory.SharedMemory] = {}   # keep worker mappings alive
+_OPENED: Dict[Tuple[str, str], tuple] = {}             # warm workers reuse views
+
+class Segments:
+    """Owner of the segments created by the coordinator."""
+    def __init__(self):
+        self._segs: List[shared_memory.SharedMemory] = []
+        atexit.register(self.close)
+
+    def put(self, arr: np.ndarray) -> Handle:
+        arr = np.ascontiguousarray(arr)
+        seg = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        self._segs.append(seg)
+        view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=seg.buf)
+        view[...] = arr
+        del view
+        return seg.name, arr.shape, arr.dtype.str
+
+    def share(self, inst) -> "SharedInstance":
+        """Publish a cache.Prepared instance's tasks and distance matrix."""
+        tasks = np.asarray(inst.edges)
+        tasks = tasks[tasks[:, 3] > 0]
+        keys = None if inst.keys is None else [int(k) for k in inst.keys]
+        return SharedInstance(self.put(tasks), self.put(inst.mat), keys)
+
+    def close(self):
+        for seg in self._segs:
+            seg.close()
+            try:
+                seg.unlink()
+            except FileNotFoundError:
+                pass
+        self._segs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ---------------------------------------------------------------- attach
+def _open(name: str) -> shared_memory.SharedMemory:
+    seg = _ATTACHED.get(name)
+    if seg is None:
+        try:
+            seg = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:                   # Python < 3.13 has no track=
+            seg = shared_memory.SharedMemory(name=name)
+        _ATTACHED[name] = seg
+    return seg
+
+def attach(h: Handle) -> np.ndarray:
+    name, shape, dtype = h
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=_open(name).buf)
+
+def attach_rows(h: Handle) -> List[memoryview]:
+    """Zero-copy rows of a 2-D int matrix, indexable as rows[a][b]."""
+    name, (rows, cols), dtype = h
+    code = {4: 'i', 8: 'q'}[np.dtype(dtype).itemsize]
+    flat = _open(name).buf[:rows * cols * np.dtype(dtype).itemsize].cast(code)
+    return [flat[i*cols:(i+1)*cols] for i in range(rows)]
+
+class SharedInstance:
+    """Picklable handle to a published instance."""
+    __slots__ = ("tasks", "dist", "keys")
+
+    def __init__(self, tasks: Handle, dist: Handle, keys: Optional[List[int]]):
+        self.tasks, self.dist, self.keys = tasks, dist, keys
+
+    def __getstate__(self):
+        return self.tasks, self.dist, self.keys
+
+    def __setstate__(self, state):
+        self.tasks, self.dist, self.keys = state
+
+    def open(self):
+        """(task tuples, dist table) read from the shared segments."""
+        key = (self.tasks[0], self.dist[0])
+        if key in _OPENED:
+            return _OPENED[key]
+        tasks = [tuple(t) for t in attach(self.tasks).tolist()]
+        rows = attach_rows(self.dist)
+        if self.keys is not None:
+            # compact matrix: dict rows keyed by vertex are built locally
+            rows = {a: dict(zip(self.keys, row.tolist()))
+                    for a, row in zip(self.keys, rows)}
+        _OPENED[key] = tasks, rows
+        return tasks, rows
+
+_WATCHING = False
+
+def _watch_parent():
+    """Exit when the coordinator dies, so the resource tracker can unlink."""
+    global _WATCHING
+    if _WATCHING:
+        return
+    _WATCHING = True
+    parent = os.getppid()
+    def loop():
+        while os.getppid() == parent:
+            time.sleep(0.5)
+        os._exit(1)
+    threading.Thread(target=loop, daemon=True).start()
+
+def run_attached(worker, pid: int, shared: SharedInstance, *args):
+    """Pool entry point: worker(pid, tasks, dist, *args) on attached arrays."""
+    _watch_parent()
+    tasks, dist = shared.open()
+    return worker(pid, tasks, dist, *args)
@@ -0,0 +1,90 @@
+# ------------------------------------------------------------
+#  Compact solution type – flat arc ids + route delimiters
+# ------------------------------------------------------------
+from array import array
+from typing import Iterable, List, Tuple
+import writer
+
+Route = List[Tuple[int,int]]
+
+# ---------------------------------------------------------------- task table
+class TaskTable:
+    """
+    Required edges numbered 0..T-1 in instance order.  Arc 2t serves task t
+    as (u,v) and arc 2t+1 serves it reversed, so `arc ^ 1` flips a task and
+    `arc >> 1` recovers its id.
+    """
+    __slots__ = ("tail", "head", "cost", "demand", "index")
+
+    def __init__(self, tasks: Iterable[Tuple[int,int,int,int]]):
+        self.tail, self.head = array('i'), array('i')
+        self.cost, self.demand = array('i'), array('i')
+        for u, v, z, d in tasks:
+            self.tail.extend((u, v))
+            self.head.extend((v, u))
+            self.cost.extend((z, z))
+            self.demand.extend((d, d))
+        self.index = {(self.tail[a], self.head[a]): a
+                      for a in range(len(self.tail))}
+
+    def __len__(self):
+        return len(self.tail) >> 1
+
+    def arc(self, u: int, v: int) -> int:
+        return self.index[(u, v)]
+
+# ---------------------------------------------------------------- solution
+class Solution:
+    """
+    Routes stored as one flat `array('i')` of arc ids plus `starts`, the
+    offsets where each route begins (len(starts) == routes + 1).  Loads and
+    costs are priced by the search itself (moves.RouteState), so only the
+    arcs, starts and value are kept and pickled.
+    """
+    __slots__ = ("arcs", "starts", "val")
+
+    def __init__(self, arcs: array, starts: array, val: int):
+        self.arcs, self.starts, self.val = arcs, starts, val
+
+    @classmethod
+    def from_routes(cls, routes: List[Route], val: int,
+                    table: TaskTable) -> "Solution":
+        arcs, starts = array('i'), array('i', [0])
+        index = table.index
+        for rt in routes:
+            arcs.extend(index[a] for a in rt)
+            starts.append(len(arcs))
+        return cls(arcs, starts, val)
+
+    @classmethod
+    def from_arcs(cls, routes: List[List[int]], val: int) -> "Solution":
+        arcs, starts = array('i'), array('i', [0])
+        for rt in routes:
+            arcs.extend(rt)
+            starts.append(len(arcs))
+        return cls(arcs, starts, val)
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    # ------------------------------------------------------------ conversion
+    def route(self, r: int) -> array:
+        return self.arcs[self.starts[r]:self.starts[r+1]]
+
+    def to_routes(self, table: TaskTable) -> List[Route]:
+        tail, head = table.tail, table.head
+        return [[(tail[a], head[a]) for a in self.route(r)]
+                for r in range(len(self))]
+
+    def text(self, table: TaskTable) -> str:
+        return writer.text(self.to_routes(table), self.val).rstrip("\n")
+
+    # ------------------------------------------------------------ pickling
+    def __getstate__(self):
+        return self.arcs.tobytes(), self.starts.tobytes(), self.val
+
+    def __setstate__(self, state):
+        arcs, starts, self.val = state
+        self.arcs, self.starts = array('i'), array('i')
+        self.arcs.frombytes(arcs)
+        self.starts.frombytes(starts)
@@ -0,0 +1,47 @@
+# ------------------------------------------------------------
+#  Ulusoy split – optimal cut of a giant tour into routes
+# ------------------------------------------------------------
+from typing import List, Tuple
+from arcs import ArcModel, ArcRoute
+INF = 0x3f3f3f3f
+
+def giant_tour(routes: List[ArcRoute]) -> ArcRoute:
+    """Giant tour of a solution: its arc routes concatenated."""
+    return [a for rt in routes for a in rt]
+
+def split(tour: ArcRoute, model: ArcModel, cap: int) -> Tuple[List[ArcRoute], int]:
+    """
+    Shortest path over the giant tour of arc ids: V[j] is the cheapest way to
+    serve the first j arcs, and a route covers a contiguous segment i..j-1.
+    Segment costs grow incrementally along j and the window ends at the first
+    capacity overflow, so the DP is O(T * tasks per route).
+    Returns (arc routes, total_cost).
+    """
+    D, cost, demand, o = model.D, model.cost, model.demand, model.depot_id
+    T = len(tour)
+    V = [0] + [INF] * T
+    P = [0] * (T + 1)
+    back = [D[a][o] for a in tour]
+    for i in range(T):
+        vi = V[i]
+        if vi >= INF:
+            continue
+        load, c, prev = 0, 0, o
+        for j in range(i, T):
+            a = tour[j]
+            load += demand[a]
+            if load > cap:
+                break
+            c += D[prev][a] + cost[a]
+            prev = a
+            total = vi + c + back[j]
+            if total < V[j+1]:
+                V[j+1], P[j+1] = total, i
+    routes: List[ArcRoute] = []
+    j = T
+    while j > 0:
+        i = P[j]
+        routes.append(tour[i:j])
+        j = i
+    routes.reverse()
+    return routes, V[T]
@@ -0,0 +1,79 @@
+# ------------------------------------------------------------
+#  Opt-in per-worker search telemetry
+# ------------------------------------------------------------
+#  A worker started with telemetry on fills one Counters and returns it as a
+#  dict; the coordinator merges them into a JSON report (stderr or a file).
+#  With telemetry off the workers create no Counters and skip every timer;
+#  intensify only bumps two local ints on its reject / accept branches.
+#
+#  Trace is the coordinator-side convergence log: one (elapsed, cost, worker)
+#  row per global-best improvement, as CSV or JSONL by file suffix.
+import csv, json, sys
+from typing import Dict, List, Optional, Tuple
+
+class Counters:
+    """Counts and seconds spent by one worker."""
+    __slots__ = ("builds", "build_time", "attempts", "cap_rejects", "accepted",
+                 "intensify_time", "sends", "send_time", "wall")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+def _rates(c: Dict[str, float]) -> Dict[str, float]:
+    wall = c["wall"] or 1e-9
+    return {
+        "builds_per_s": c["builds"] / wall,
+        "attempts_per_s": c["attempts"] / wall,
+        "cap_reject_share": c["cap_rejects"] / c["attempts"] if c["attempts"] else 0.0,
+        "accept_share": c["accepted"] / c["attempts"] if c["attempts"] else 0.0,
+        "build_share": c["build_time"] / wall,
+        "intensify_share": c["intensify_time"] / wall,
+        "send_share": c["send_time"] / wall,
+    }
+
+def report(workers: List[Optional[Dict[str, float]]], wall: float) -> dict:
+    """Merge the workers' counters; rates are per worker-second."""
+    per = [dict(w, worker=i, **_rates(w)) for i, w in enumerate(workers) if w]
+    total = {name: sum(w[name] for w in per) for name in Counters.__slots__}
+    return {"wall": wall, "workers": len(per), "total": dict(total, **_rates(total)),
+            "per_worker": per}
+
+def emit(rep: dict, path: str = "-"):
+    if path == "-":
+        json.dump(rep, sys.stderr, indent=1)
+        sys.stderr.write("\n")
+    else:
+        with open(path, "w") as f:
+            json.dump(rep, f, indent=1)
+
+# ---------------------------------------------------------------- convergence trace
+TraceRow = Tuple[float, int, int]         # (elapsed seconds, cost, worker id)
+
+class Trace:
+    """Anytime log of the global best; worker -1 is the coordinator itself."""
+    def __init__(self, path: str, start: float):
+        self.path, self.start, self.rows = path, start, []
+
+    def add(self, now: float, cost: int, pid: int):
+        self.rows.append((round(now - self.start, 4), cost, pid))
+
+    def write(self):
+        with open(self.path, "w", newline="") as f:
+            if self.path.endswith(".jsonl"):
+                for t, c, w in self.rows:
+                    f.write(json.dumps({"elapsed": t, "cost": c, "worker": w}) + "\n")
+            else:
+                w = csv.writer(f)
+                w.writerow(("elapsed", "cost", "worker"))
+                w.writerows(self.rows)
+
+def read_trace(path: str) -> List[TraceRow]:
+    with open(path, newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+            return [(r["elapsed"], r["cost"], r["worker"]) for r in rows]
+        return [(float(t), int(c), int(w)) for t, c, w in list(csv.reader(f))[1:]]
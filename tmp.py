@@ -3,10 +3,25 @@
 #  CARP solver – greedy multi-start + 8-way parallel +
 #                 local-search intensification per shuffle
 # ------------------------------------------------------------
-import sys, argparse, time, random, os, queue
-from multiprocessing import get_context, Queue
+import sys, argparse, time, random, os
+from multiprocessing import get_context
 from concurrent.futures import ProcessPoolExecutor
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
+from cache import load_instance
+from channel import BestChannel, install, offer, emigrate, immigrants
+from island import TOPOLOGIES, Elite, Islands, kick
+from shm import Segments, run_attached
+from arcs import ArcModel, ArcRoute
+from greedy import NearestIndex
+from split import giant_tour, split
+from moves import RouteState
+from granular import Granular, granularity, nearest
+from localsearch import LocalSearch, OPERATORS, operators
+from mergesplit import MergeSplit, PATIENCE
+from pathscan import STARTS
+from solution import Solution, TaskTable
+from writer import FORMATS, write
+from telemetry import Counters, Trace, emit, report
 INF = 0x3f3f3f3f
 
 # ---------------------------------------------------------------- Edge / helpers
@@ -16,55 +31,22 @@ class Edge:
         self.x, self.y, self.z, self.c = x, y, z, c
 
 def build_routes(edges: List[Edge], g, st: int, Q: int):
-    """Greedy builder (original). Returns (routes, total_cost)."""
-    edges = edges[:]           # copy
-    routes, total = [], 0
-    while edges:
-        p, q = st, Q
-        route = []
-        while edges:
-            idx = min(range(len(edges)),
-                      key=lambda i: min(g[p][edges[i].x], g[p][edges[i].y]))
-            ed = edges[idx]
-            if ed.c > q:
-                break
-            if g[p][ed.x] > g[p][ed.y]:     # orient
-                ed.x, ed.y = ed.y, ed.x
-            total += g[p][ed.x] + ed.z
-            route.append((ed.x, ed.y))
-            q -= ed.c
-            p = ed.y
-            edges.pop(idx)
-        total += g[p][st]                   # back to depot
-        if route:
-            routes.append(route)
-    return routes, total
+    """Greedy builder (original tie-breaking). Returns (routes, total_cost)."""
+    return NearestIndex(ArcModel([(e.x,e.y,e.z,e.c) for e in edges], g, st)).build(
+        range(len(edges)), Q, skip=False)
 
 # ----------------------------------------------------------------
 #  intensify: random 2‐edge swaps + 1‐edge orientation tweaks
 # ----------------------------------------------------------------
-def intensify(routes: List[List[Tuple[int,int]]],
-              g, st: int, Q: int,
-              demand_map, cost_map,
-              attempts: int=150000) -> Tuple[List[List[Tuple[int,int]]], int]:
-    curr = [list(rt) for rt in routes]
-    best = curr
-    def route_cost(rt):
-        tot, cur = 0, st
-        for u,v in rt:
-            tot += g[cur][u] + cost_map[(u,v)]
-            cur = v
-        tot += g[cur][st]
-        return tot
-    def route_demand(rt):
-        return sum(demand_map[(u,v)] for u,v in rt)
-
-    curr_val = sum(route_cost(rt) for rt in curr)
-    best_val = curr_val
-
-    # precompute “unchanged” cost contributions by route index
-    def total_except(r_indices):
-        return sum(route_cost(curr[i]) for i in range(len(curr)) if i not in r_indices)
+def intensify(routes: List[ArcRoute],
+              model: ArcModel, Q: int,
+              attempts: int=150000,
+              stats: Optional[Counters] = None,
+              near: Optional[List[List[int]]] = None) -> Tuple[List[ArcRoute], int]:
+    # moves are priced by RouteState from their neighbouring arcs only;
+    # routes are touched in place only when a move is accepted
+    state = RouteState(routes, model, Q)
+    curr = state.routes
 
     # flatten positions
     positions = [(ri, pi)
@@ -72,68 +54,60 @@ def intensify(routes: List[List[Tuple[int,int]]],
                  for pi in range(len(rt))]
 
     rng = random.Random()
+    rejected = accepted = 0
+    # granular: swaps / reinsertions only between a task and a near task
+    moves = Granular(state, near, flip=True) if near is not None else None
 
     for _ in range(attempts):
         if rng.random() < 0.5:
-            # --- two‐edge swap as before ---
+            if moves is not None:
+                res = moves.attempt(rng)
+                if res < 0:
+                    rejected += 1
+                elif res:
+                    accepted += 1
+                continue
+            # --- two‐edge swap, best of the four orientations ---
             r1,p1 = rng.choice(positions)
             r2,p2 = rng.choice(positions)
             if (r1,p1)==(r2,p2): continue
+            if not state.swap_fits(r1, p1, r2, p2):
+                rejected += 1
+                continue
 
-            base = [list(rt) for rt in curr]
-            e1 = base[r2][p2]
-            e2 = base[r1][p1]
-            base[r1][p1], base[r2][p2] = e1, e2
-
-            const_cost = total_except({r1, r2})
-
-            best_local, best_local_val = None, INF
-            for flip1 in (False, True):
-                for flip2 in (False, True):
-                    new = [list(rt) for rt in base]
-                    u1,v1 = (e1 if not flip1 else (e1[1], e1[0]))
-                    u2,v2 = (e2 if not flip2 else (e2[1], e2[0]))
-                    new[r1][p1] = (u1,v1)
-                    new[r2][p2] = (u2,v2)
-                    # capacity check
-                    if r1!=r2 and (route_demand(new[r1])>Q or route_demand(new[r2])>Q):
-                        continue
-                    val = const_cost + route_cost(new[r1]) + route_cost(new[r2])
-                    if val < best_local_val:
-                        best_local_val = val
-                        best_local = new
-            if best_local is None:
+            e1 = curr[r2][p2]
+            e2 = curr[r1][p1]
+            best_move, best_delta = None, 0
+            for a1 in (e1, e1 ^ 1):
+                for a2 in (e2, e2 ^ 1):
+                    d1, d2 = state.swap_delta(r1, p1, a1, r2, p2, a2)
+                    if d1 + d2 < best_delta:
+                        best_delta = d1 + d2
+                        best_move = (a1, a2, d1, d2)
+            if best_move is None:
                 continue
-            new, nv = best_local, best_local_val
+            a1, a2, d1, d2 = best_move
+            state.swap(r1, p1, a1, r2, p2, a2, d1, d2)
+            accepted += 1
 
         else:
             # --- single-edge orientation tweak ---
-            r, p = rng.choice(positions)
-            e = curr[r][p]
-            # try both orientations
-            best_local, best_local_val = None, INF
-            const_cost = total_except({r})
-            for flip in (False, True):
-                new = [list(rt) for rt in curr]
-                u,v = (e if not flip else (e[1], e[0]))
-                new[r][p] = (u,v)
-                if route_demand(new[r]) > Q:
-                    continue
-                val = const_cost + route_cost(new[r])
-                if val < best_local_val:
-                    best_local_val = val
-                    best_local = new
-            if best_local is None:
-                continue
-            new, nv = best_local, best_local_val
-
-        # accept strictly improving moves
-        if nv < curr_val:
-            curr, curr_val = new, nv
-            if nv < best_val:
-                best, best_val = new, nv
-
-    return best, best_val
+            if moves is not None:
+                # reinsertions shift positions: locate a random task instead
+                r, p = moves.where[rng.randrange(len(near))]
+            else:
+                r, p = rng.choice(positions)
+            flip = curr[r][p] ^ 1
+            delta = state.replace_delta(r, p, flip)
+            if delta < 0:
+                state.replace(r, p, flip, delta)
+                accepted += 1
+
+    if stats is not None:
+        stats.attempts += attempts
+        stats.cap_rejects += rejected
+        stats.accepted += accepted
+    return state.snapshot(), state.total
 
 # ---------------------------------------------------------------- SA worker replaced by shuffle+intensify
 def sa_worker(pid: int,
@@ -141,90 +115,115 @@ def sa_worker(pid: int,
               g, st: int, Q: int,
               time_budget: float,
               seed: int,
-              out_q: Queue):
+              offer: Callable,
+              decoder: str = "greedy",
+              migration: Optional[Tuple[float,int]] = None,
+              telemetry: bool = False,
+              granular: int = 0,
+              ls_ops: Tuple[str, ...] = (),
+              descent: str = "first",
+              merge_split: Optional[Tuple[int,int]] = None,
+              start: str = "greedy"):
     rng = random.Random(seed)
-    original_edges = [Edge(*t) for t in edges_data]
-
-    # prepare maps once
-    demand_map = {(e.x,e.y):e.c for e in original_edges}
-    demand_map.update({(e.y,e.x):e.c for e in original_edges})
-    cost_map   = {(e.x,e.y):e.z for e in original_edges}
-    cost_map.update({(e.y,e.x):e.z for e in original_edges})
+    stats = Counters() if telemetry else None
+    clock = time.perf_counter
+
+    # arc model once: every evaluation below is integer indexing
+    model = ArcModel(edges_data, g, st)
+    index = NearestIndex(model)
+    near = nearest(model, granular) if granular else None
+    # optional descent over the CARP move set after each intensify
+    ls = LocalSearch(model, Q, ls_ops, descent == "best", near) if ls_ops else None
+    # merge-split: (routes merged per rebuild, subsets sampled per step)
+    ms = MergeSplit(model, Q, *merge_split) if merge_split else None
+    curr: List[ArcRoute] = []
+    curr_val, stall = INF, 0
+    order = list(range(len(edges_data)))
 
     best_val = INF
-    best_routes: List[List[Tuple[int,int]]] = []
+    best_routes: List[ArcRoute] = []
     deadline = time.time() + time_budget
 
+    def publish(val: int, routes: List[ArcRoute]):
+        nonlocal best_val, best_routes
+        if val < best_val:
+            t = clock()
+            best_val, best_routes = val, routes
+            sent = offer(best_val, Solution.from_arcs(best_routes, best_val), pid)
+            if stats:
+                stats.sends += sent
+                stats.send_time += clock() - t
+
+    # island mode: (seconds between migrations, migrants per migration)
+    elite = Elite(migration[1]) if migration else None
+    arrivals: List[Solution] = []
+    next_migration = time.time() + migration[0] if migration else INF
+
+    started = clock()
     while time.time() < deadline:
-        # 1) random shuffle + greedy
-        rng.shuffle(original_edges)
-        routes, val = build_routes(
-            [Edge(e.x,e.y,e.z,e.c) for e in original_edges],
-            g, st, Q)
+        if migration:
+            arrivals = sorted(arrivals + immigrants(pid),
+                              key=lambda sol: sol.val)[:migration[1]]
+        rebuilt = not arrivals and ms is not None and bool(curr) and stall < PATIENCE
+        if stats: t0 = clock()
+        if arrivals:
+            # 1') restart from an immigrant: kicked giant tour, optimal split
+            tour = list(arrivals.pop(0).arcs)
+            routes, val = split(kick(tour, rng), model, Q)
+        elif rebuilt:
+            # rebuild sampled route subsets of the incumbent instead of restarting
+            routes, val = ms.step(curr, rng)
+        else:
+            # 1) random shuffle + greedy, or a path-scanning start
+            if start == "greedy":
+                rng.shuffle(order)
+                routes, val = index.build_arcs(order, Q, skip=False)
+            else:
+                routes, val = index.path_scan(Q, start, rng)
+            if decoder == "split":
+                # re-cut the greedy task sequence optimally
+                routes, val = split(giant_tour(routes), model, Q)
+        if stats:
+            t1 = clock()
+            stats.builds += 1
+            stats.build_time += t1 - t0
 
         # 2) intensify via 150k random swaps
-        imp_routes, imp_val = intensify(routes, g, st, Q,
-                                        demand_map, cost_map,
-                                        attempts=150000)
+        imp_routes, imp_val = intensify(routes, model, Q,
+                                        attempts=150000, stats=stats, near=near)
 
-        # 3) accept improvement
+        # 3) accept improvement, then descend over the full move set
         if imp_val < val:
             routes, val = imp_routes, imp_val
+        if ls is not None:
+            # the descent stops at the deadline: offer what intensify reached first
+            publish(val, routes)
+            routes, val = ls.run(routes, stats, deadline)
+        if stats:
+            stats.intensify_time += clock() - t1
+
+        if ms is not None:
+            # a restart resets the incumbent; a rebuild must improve it
+            if not rebuilt or val < curr_val:
+                curr, curr_val, stall = routes, val, 0
+            else:
+                stall += 1
 
         # 4) record global best
-        if val < best_val:
-            best_val, best_routes = val, routes
-            out_q.put((best_val, best_routes))
+        publish(val, routes)
 
-    # ensure at least one result
-    out_q.put((best_val, best_routes))
+        # 5) island migration of the local elite
+        if migration:
+            elite.add(val, routes)
+            if time.time() >= next_migration:
+                emigrate(pid, [Solution.from_arcs(r, v) for v, r in elite.best()])
+                next_migration += migration[0]
 
-# ---------------------------------------------------------------- Floyd-Warshall
-def floyd(n: int, g):
-    for k in range(1, n+1):
-        row_k = g[k]
-        for i in range(1, n+1):
-            ik = g[i][k]
-            if ik == INF: continue
-            row_i = g[i]
-            for j in range(1, n+1):
-                alt = ik + row_k[j]
-                if alt < row_i[j]:
-                    row_i[j] = alt
-
-# ---------------------------------------------------------------- read instance
-def read_instance(path: str):
-    with open(path) as f:
-        _  = f.readline()
-        n  = int(f.readline().split()[2])
-        st = int(f.readline().split()[2])
-        m1 = int(f.readline().split()[3])
-        m2 = int(f.readline().split()[3])
-        _T = int(f.readline().split()[2])
-        Q  = int(f.readline().split()[2])
-        _  = f.readline(); _ = f.readline()
-        m = m1 + m2
-
-        g = [[INF]*(n+1) for _ in range(n+1)]
-        for i in range(1, n+1): g[i][i] = 0
-        edges = []
-        for _ in range(m):
-            x,y,z,c = map(int, f.readline().split())
-            if c: edges.append(Edge(x,y,z,c))
-            if z < g[x][y]: g[x][y] = g[y][x] = z
-        _ = f.readline()
-    floyd(n, g)
-    return n, st, Q, g, edges
-
-# ---------------------------------------------------------------- print answer
-def output(routes, val):
-    print("s ", end="")
-    for i, rt in enumerate(routes):
-        print("0,", end="")
-        for u,v in rt:
-            print(f"({u},{v}),", end="")
-        print("0" if i==len(routes)-1 else "0,", end="")
-    print(f"\nq {val}")
+    # last word, sent only if it is still a global best
+    offer(best_val, Solution.from_arcs(best_routes, best_val), pid)
+    if stats:
+        stats.wall = clock() - started
+        return stats.as_dict()
 
 # ---------------------------------------------------------------- main
 def main():
@@ -232,14 +231,42 @@ def main():
     ap.add_argument("instance_file")
     ap.add_argument("-t","--termination", type=float, default=30.0)
     ap.add_argument("-s","--seed", type=int, default=1)
+    ap.add_argument("--format", choices=FORMATS, default="text",
+                    help="answer as s/q text, JSON or binary route arrays")
+    ap.add_argument("-w","--workers", type=int, default=0,
+                    help="worker processes (default: min(20, cpu count))")
+    ap.add_argument("--decoder", choices=("greedy", "split"), default="greedy")
+    ap.add_argument("--islands", choices=TOPOLOGIES, default=None,
+                    help="migrate elite solutions between workers")
+    ap.add_argument("--migrate-every", type=float, default=1.0,
+                    help="seconds between migrations (island mode)")
+    ap.add_argument("--migrants", type=int, default=2,
+                    help="solutions sent per migration (island mode)")
+    ap.add_argument("--granular", type=granularity, default=0, metavar="K",
+                    help="local search moves only between each task and its K nearest tasks")
+    ap.add_argument("--ls", type=operators, default=None, metavar="OPS",
+                    help="descent after intensify: 'all' or a comma list of "
+                         + ",".join(OPERATORS))
+    ap.add_argument("--descent", choices=("first", "best"), default="first",
+                    help="apply the first or the best improving move (--ls)")
+    ap.add_argument("--merge-split", type=int, default=0, metavar="P",
+                    help="rebuild P merged routes of the incumbent instead of restarting")
+    ap.add_argument("--ms-samples", type=int, default=8,
+                    help="route subsets tried per merge-split step")
+    ap.add_argument("--start", choices=STARTS, default="greedy",
+                    help="start constructor: shuffled greedy or path scanning by rule")
+    ap.add_argument("--telemetry", nargs="?", const="-", default=None, metavar="PATH",
+                    help="per-worker counters as JSON (stderr, or PATH)")
+    ap.add_argument("--trace", metavar="PATH", default=None,
+                    help="log (elapsed, cost, worker) per global-best improvement (.csv/.jsonl)")
     args = ap.parse_args()
 
     random.seed(args.seed)
-    n, st, Q, g, edges = read_instance(args.instance_file)
+    inst = load_instance(args.instance_file)
+    st, Q, edges_data = inst.depot, inst.capacity, inst.tasks()
+    edges = [Edge(*t) for t in edges_data]
 
-    edges_data = [(e.x,e.y,e.z,e.c) for e in edges]
-
-    workers = min(20, os.cpu_count() or 1)
+    workers = args.workers or min(20, os.cpu_count() or 1)
     if args.termination < 1.5:
         workers = 1
     per_worker = args.termination - 0.3
@@ -247,28 +274,42 @@ def main():
         workers, per_worker = 1, args.termination - 0.05
 
     ctx = get_context("spawn")
-    q: Queue = ctx.Manager().Queue()
+    islands = Islands(ctx, workers, args.islands) if args.islands else None
+    migration = (args.migrate_every, args.migrants) if islands else None
+    ch = BestChannel(ctx, islands)
 
     start = time.time()
-    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
-        for i in range(workers):
-            pool.submit(sa_worker, i, edges_data, g, st, Q,
-                        per_worker, args.seed + 10007 * i, q)
-
-        best_val, best_routes = INF, []
+    trace = Trace(args.trace, start) if args.trace else None
+    # tasks + distance matrix published once; workers attach zero-copy
+    with Segments() as segs, \
+         ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=install, initargs=(ch,)) as pool:
+        shared = segs.share(inst)
+        futs = [pool.submit(run_attached, sa_worker, i, shared, st, Q,
+                            per_worker, args.seed + 10007 * i, offer, args.decoder,
+                            migration, args.telemetry is not None, args.granular,
+                            args.ls or (), args.descent,
+                            (args.merge_split, args.ms_samples) if args.merge_split else None,
+                            args.start)
+                for i in range(workers)]
+
+        best_val, best_sol = INF, None
         deadline = start + args.termination - 0.05
-        while time.time() < deadline:
-            try:
-                val, routes = q.get(timeout=0.02)
-                if val < best_val:
-                    best_val, best_routes = val, routes
-            except queue.Empty:
-                pass
+        for val, pid, sol in ch.receive(deadline):
+            if val < best_val:
+                best_val, best_sol = val, sol
+                if trace: trace.add(time.time(), val, pid)
+
+    if args.telemetry:
+        emit(report([f.result() for f in futs], time.time() - start), args.telemetry)
 
     if best_val == INF:
-        best_routes, best_val = build_routes(edges, g, st, Q)
+        best_routes, best_val = build_routes(edges, inst.dist(), st, Q)
+    else:
+        best_routes = best_sol.to_routes(TaskTable(edges_data))
 
-    output(best_routes, best_val)
+    if trace: trace.write()
+    write(best_routes, best_val, args.format)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------
+#  Batch validation – many solution files across a pool
+# ------------------------------------------------------------
+#  python validate.py -i gdb1.dat out/gdb1_*.txt
+#  python validate.py --results results.csv        # rows written by batch.py
+#
+#  Each instance is parsed and its distance matrix computed once in the
+#  coordinator, then published to shared memory; workers attach to it and
+#  check their share of that instance's solutions with legal.audit.  The
+#  summary table has one row per solution: legal or not, given and computed
+#  q, and the capacity / vehicle / task violations found.
+import argparse, csv, glob, json, os, sys
+from collections import defaultdict
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+import legal
+from shm import Segments, attach
+
+FIELDS = ("instance", "solution", "status", "q_given", "q_calc", "problems")
+Item = Tuple[str, str]                    # (label, solution text)
+
+# ---------------------------------------------------------------- worker side
+_INSTANCES: Dict[str, dict] = {}
+
+def check(inst_path: str, mat_h, pos_h, items: List[Item]) -> List[tuple]:
+    inst = _INSTANCES.get(inst_path)
+    if inst is None:
+        inst = _INSTANCES[inst_path] = legal.parse_instance(inst_path)
+    cost = attach(mat_h), attach(pos_h)
+    rows = []
+    for label, text in items:
+        try:
+            routes, q = legal.parse_solution_text(text)
+        except ValueError as exc:
+            rows.append((inst_path, label, "unreadable", "", "", str(exc)))
+            continue
+        total, problems = legal.audit(routes, inst, cost)
+        kinds = sorted(problems)
+        if total is not None and total != q:
+            kinds.append("q")
+        status = "legal" if not kinds else "illegal"
+        rows.append((inst_path, label, status, q, "" if total is None else total,
+                     ";".join(kinds)))
+    return rows
+
+# ---------------------------------------------------------------- inputs
+def from_files(instance: str, patterns: List[str]) -> Dict[str, List[Item]]:
+    items = []
+    for p in patterns:
+        for path in sorted(glob.glob(p)) or [p]:
+            with open(path) as f:
+                items.append((path, f.read()))
+    return {instance: items}
+
+def from_results(path: str) -> Dict[str, List[Item]]:
+    """batch.py output: the routes column is the s-line, cost the q value."""
+    with open(path, newline="") as f:
+        rows = [json.loads(l) for l in f if l.strip()] if path.endswith(".jsonl") \
+            else list(csv.DictReader(f))
+    groups = defaultdict(list)
+    for r in rows:
+        groups[r["instance"]].append((f"seed {r['seed']}", f"{r['routes']}\nq {r['cost']}"))
+    return groups
+
+# ---------------------------------------------------------------- main
+def main():
+    ap = argparse.ArgumentParser(description="validate many CARP solutions in parallel")
+    ap.add_argument("solutions", nargs="*", help="solution files or globs (with -i)")
+    ap.add_argument("-i","--instance", help="instance the solution files belong to")
+    ap.add_argument("--results", help="batch.py CSV/JSONL output to validate instead")
+    ap.add_argument("-w","--workers", type=int, default=0)
+    ap.add_argument("-o","--output", default="", help="write the summary as CSV")
+    args = ap.parse_args()
+
+    if args.results:
+        groups = from_results(args.results)
+    elif args.instance and args.solutions:
+        groups = from_files(args.instance, args.solutions)
+    else:
+        ap.error("give -i INSTANCE with solution files, or --results")
+
+    workers = args.workers or os.cpu_count() or 1
+    rows = []
+    with Segments() as segs, \
+         ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futs = []
+        for inst_path, items in groups.items():
+            mat, pos = legal.build_graph(legal.parse_instance(inst_path))
+            mat_h, pos_h = segs.put(mat), segs.put(pos)
+            step = -(-len(items) // workers)
+            futs += [pool.submit(check, inst_path, mat_h, pos_h, items[k:k+step])
+                     for k in range(0, len(items), step)]
+        for fut in futs:
+            rows += fut.result()
+
+    # an empty batch run still prints the header and a 0-of-0 summary
+    wi = max([len(FIELDS[0])] + [len(os.path.basename(r[0])) for r in rows])
+    ws = max([len(FIELDS[1])] + [len(r[1]) for r in rows])
+    print(f"{'instance':<{wi}}  {'solution':<{ws}}  {'status':<11}{'q_given':>9}{'q_calc':>9}  problems")
+    for inst_path, label, status, q, calc, problems in rows:
+        print(f"{os.path.basename(inst_path):<{wi}}  {label:<{ws}}  {status:<11}{q:>9}{calc:>9}  {problems}")
+    bad = sum(r[2] != "legal" for r in rows)
+    print(f"\n{len(rows) - bad} legal, {bad} illegal of {len(rows)}")
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            out = csv.writer(f)
+            out.writerow(FIELDS)
+            out.writerows(rows)
+    sys.exit(1 if bad else 0)
+
+if __name__ == "__main__":
+    main()
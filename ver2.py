@@ -2,10 +2,18 @@
 # ------------------------------------------------------------
 #  CARP solver – greedy + simulated annealing + 8‑way parallel
 # ------------------------------------------------------------
-import sys, argparse, time, random, math, os, queue
-from multiprocessing import get_context, Queue
+import sys, argparse, time, random, math, os
+from multiprocessing import get_context
 from concurrent.futures import ProcessPoolExecutor
-from typing import List, Tuple
+from typing import Callable, List, Tuple
+from cache import load_instance
+from channel import BestChannel, install, offer
+from shm import Segments, run_attached
+from arcs import ArcModel
+from greedy import NearestIndex
+from pathscan import STARTS
+from writer import FORMATS, write
+from telemetry import Counters, Trace, emit, report
 INF = 0x3f3f3f3f
 
 # ---------------------------------------------------------------- Edge / helpers
@@ -15,29 +23,10 @@ class Edge:
         self.x, self.y, self.z, self.c = x, y, z, c
 
 def build_routes(edges: List[Edge], g, st: int, Q: int):
-    """Greedy builder (原版).  Returns (routes, total_cost)."""
-    edges = edges[:]           # copy
-    routes, total = [], 0
-    while edges:
-        p, q = st, Q
-        route = []
-        while edges:
-            idx = min(range(len(edges)),
-                      key=lambda i: min(g[p][edges[i].x], g[p][edges[i].y]))
-            ed = edges[idx]
-            if ed.c > q:
-                break
-            if g[p][ed.x] > g[p][ed.y]:     # orient
-                ed.x, ed.y = ed.y, ed.x
-            total += g[p][ed.x] + ed.z
-            route.append((ed.x, ed.y))
-            q -= ed.c
-            p = ed.y
-            edges.pop(idx)
-        total += g[p][st]                   # back to depot
-        if route:
-            routes.append(route)
-    return routes, total
+    """Greedy builder (original tie-breaking). Returns (routes, total_cost)."""
+    model = ArcModel([(e.x,e.y,e.z,e.c) for e in edges], g, st)
+    return NearestIndex(model).build(
+        range(len(edges)), Q, skip=False)
 
 # ---------------------------------------------------------------- SA worker
 def sa_worker(pid: int,
@@ -45,21 +34,33 @@ def sa_worker(pid: int,
               g, st: int, Q: int,
               time_budget: float,
               seed: int,
-              out_q: Queue):
+              offer: Callable,
+              telemetry: bool = False,
+              start: str = "greedy"):
     rng = random.Random(seed)
-    # rebuild Edge objects locally (faster than pickling large objects many times)
-    original_edges = [Edge(*t) for t in edges_data]
-
-    # initial state: random shuffle
-    curr_order = original_edges[:]
-    rng.shuffle(curr_order)
-    curr_routes, curr_val = build_routes([Edge(e.x,e.y,e.z,e.c) for e in curr_order],
-                                         g, st, Q)
-    best_routes, best_val = curr_routes, curr_val
+    stats = Counters() if telemetry else None
+    clock = time.perf_counter
+    # greedy over per-vertex candidate lists, built once per worker
+    index = NearestIndex(ArcModel(edges_data, g, st))
+
+    # initial state: random shuffle of task ids, or a path-scanning sequence
+    if start == "greedy":
+        curr_order = list(range(len(edges_data)))
+        rng.shuffle(curr_order)
+        curr_routes, curr_val = index.build(curr_order, Q, skip=False)
+        best_routes, best_val = curr_routes, curr_val
+    else:
+        arcs, best_val = index.path_scan(Q, start, rng)
+        best_routes = index.model.to_routes(arcs)
+        curr_order = [a >> 1 for rt in arcs for a in rt]
+        curr_routes, curr_val = index.build(curr_order, Q, skip=False)
+        if curr_val < best_val:
+            best_routes, best_val = curr_routes, curr_val
 
     T0 = 600.0                             # initial temperature
     Tend = 1e-2
-    steps = 0
+    steps = accepted = 0
+    started = clock()
     deadline = time.time() + time_budget
     while time.time() < deadline:
         steps += 1
@@ -70,67 +71,32 @@ def sa_worker(pid: int,
         i, j = rng.sample(range(len(curr_order)), 2)
         curr_order[i], curr_order[j] = curr_order[j], curr_order[i]
         # evaluate
-        routes, val = build_routes([Edge(e.x,e.y,e.z,e.c) for e in curr_order],
-                                   g, st, Q)
+        if stats: t0 = clock()
+        routes, val = index.build(curr_order, Q, skip=False)
+        if stats: stats.build_time += clock() - t0
         delta = val - curr_val
         if delta < 0 or rng.random() < math.exp(-delta / T):
             # accept
+            accepted += 1
             curr_routes, curr_val = routes, val
             if val < best_val:
                 best_routes, best_val = routes, val
-                out_q.put((best_val, best_routes))
+                if stats:
+                    t0 = clock()
+                    stats.sends += offer(best_val, best_routes, pid)
+                    stats.send_time += clock() - t0
+                else:
+                    offer(best_val, best_routes, pid)
         else:
             # revert swap
             curr_order[i], curr_order[j] = curr_order[j], curr_order[i]
-    # ensure at least one result sent
-    out_q.put((best_val, best_routes))
-
-# ---------------------------------------------------------------- Floyd‑Warshall
-def floyd(n: int, g):
-    for k in range(1, n+1):
-        row_k = g[k]
-        for i in range(1, n+1):
-            ik = g[i][k]
-            if ik == INF: continue
-            row_i = g[i]
-            for j in range(1, n+1):
-                alt = ik + row_k[j]
-                if alt < row_i[j]:
-                    row_i[j] = alt
-
-# ---------------------------------------------------------------- read instance
-def read_instance(path: str):
-    with open(path) as f:
-        _  = f.readline()
-        n  = int(f.readline().split()[2])
-        st = int(f.readline().split()[2])
-        m1 = int(f.readline().split()[3])
-        m2 = int(f.readline().split()[3])
-        _T = int(f.readline().split()[2])
-        Q  = int(f.readline().split()[2])
-        _  = f.readline(); _ = f.readline()
-        m = m1 + m2
-
-        g = [[INF]*(n+1) for _ in range(n+1)]
-        for i in range(1, n+1): g[i][i] = 0
-        edges = []
-        for _ in range(m):
-            x,y,z,c = map(int, f.readline().split())
-            if c: edges.append(Edge(x,y,z,c))
-            if z < g[x][y]: g[x][y] = g[y][x] = z
-        _ = f.readline()
-    floyd(n, g)
-    return n, st, Q, g, edges
-
-# ---------------------------------------------------------------- print answer
-def output(routes, val):
-    print("s ", end="")
-    for i, rt in enumerate(routes):
-        print("0,", end="")
-        for u,v in rt:
-            print(f"({u},{v}),", end="")
-        print("0" if i==len(routes)-1 else "0,", end="")
-    print(f"\nq {val}")
+    # last word, sent only if it is still a global best
+    offer(best_val, best_routes, pid)
+    if stats:
+        # every SA step is one greedy decode
+        stats.builds = stats.attempts = steps
+        stats.accepted, stats.wall = accepted, clock() - started
+        return stats.as_dict()
 
 # ---------------------------------------------------------------- main
 def main():
@@ -138,15 +104,24 @@ def main():
     ap.add_argument("instance_file")
     ap.add_argument("-t","--termination", type=float, default=30.0)
     ap.add_argument("-s","--seed", type=int, default=1)
+    ap.add_argument("--format", choices=FORMATS, default="text",
+                    help="answer as s/q text, JSON or binary route arrays")
+    ap.add_argument("--start", choices=STARTS, default="greedy",
+                    help="start constructor: shuffled greedy or path scanning by rule")
+    ap.add_argument("--telemetry", nargs="?", const="-", default=None, metavar="PATH",
+                    help="per-worker counters as JSON (stderr, or PATH)")
+    ap.add_argument("--trace", metavar="PATH", default=None,
+                    help="log (elapsed, cost, worker) per global-best improvement (.csv/.jsonl)")
+    ap.add_argument("-w","--workers", type=int, default=0,
+                    help="worker processes (default: min(8, cpu count))")
     args = ap.parse_args()
 
     random.seed(args.seed)
-    n, st, Q, g, edges = read_instance(args.instance_file)
-
-    # Pack edges into tuples for easy pickle
-    edges_data = [(e.x,e.y,e.z,e.c) for e in edges]
+    inst = load_instance(args.instance_file)
+    st, Q, edges_data = inst.depot, inst.capacity, inst.tasks()
+    edges = [Edge(*t) for t in edges_data]
 
-    workers = min(8, os.cpu_count() or 1)
+    workers = args.workers or min(8, os.cpu_count() or 1)
     if args.termination < 1.5:        # tiny limit → single process safer
         workers = 1
     per_worker = args.termination - 0.3
@@ -154,30 +129,36 @@ def main():
         workers, per_worker = 1, args.termination - 0.05
 
     ctx = get_context("spawn")
-    q: Queue = ctx.Manager().Queue()
+    ch = BestChannel(ctx)
 
     start = time.time()
-    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
-        for i in range(workers):
-            seed_i = args.seed + 10007 * i
-            pool.submit(sa_worker, i, edges_data, g, st, Q,
-                        per_worker, seed_i, q)
+    trace = Trace(args.trace, start) if args.trace else None
+    # tasks + distance matrix published once; workers attach zero-copy
+    with Segments() as segs, \
+         ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=install, initargs=(ch,)) as pool:
+        shared = segs.share(inst)
+        futs = [pool.submit(run_attached, sa_worker, i, shared, st, Q,
+                            per_worker, args.seed + 10007 * i, offer,
+                            args.telemetry is not None, args.start)
+                for i in range(workers)]
 
         best_val, best_routes = INF, []
         deadline = start + args.termination - 0.05
-        while time.time() < deadline:
-            try:
-                val, routes = q.get(timeout=0.02)
-                if val < best_val:
-                    best_val, best_routes = val, routes
-            except queue.Empty:
-                pass
+        for val, pid, routes in ch.receive(deadline):
+            if val < best_val:
+                best_val, best_routes = val, routes
+                if trace: trace.add(time.time(), val, pid)
+
+    if args.telemetry:
+        emit(report([f.result() for f in futs], time.time() - start), args.telemetry)
 
     # fallback if nothing received
     if best_val == INF:
-        best_routes, best_val = build_routes(edges, g, st, Q)
+        best_routes, best_val = build_routes(edges, inst.dist(), st, Q)
 
-    output(best_routes, best_val)
+    if trace: trace.write()
+    write(best_routes, best_val, args.format)
 
 if __name__ == "__main__":
     main()
@@ -3,10 +3,19 @@
 #  CARP solver – greedy + simulated annealing + 8-way parallel +
 #                 post-processing hill-climb phase
 # ------------------------------------------------------------
-import sys, argparse, time, random, math, os, queue
-from multiprocessing import get_context, Queue
+import sys, argparse, time, random, math, os
+from multiprocessing import get_context
 from concurrent.futures import ProcessPoolExecutor
-from typing import List, Tuple
+from typing import Callable, List, Tuple
+from cache import load_instance
+from channel import BestChannel, install, offer
+from shm import Segments, run_attached
+from arcs import ArcModel
+from greedy import NearestIndex
+from pathscan import STARTS
+from writer import FORMATS, write
+from telemetry import Counters, Trace, emit, report
+from split import giant_tour, split
 INF = 0x3f3f3f3f
 
 # ---------------------------------------------------------------- Edge / helpers
@@ -16,29 +25,10 @@ class Edge:
         self.x, self.y, self.z, self.c = x, y, z, c
 
 def build_routes(edges: List[Edge], g, st: int, Q: int):
-    """Greedy builder (original). Returns (routes, total_cost)."""
-    edges = edges[:]           # copy
-    routes, total = [], 0
-    while edges:
-        p, q = st, Q
-        route = []
-        while edges:
-            idx = min(range(len(edges)),
-                      key=lambda i: min(g[p][edges[i].x], g[p][edges[i].y]))
-            ed = edges[idx]
-            if ed.c > q:
-                break
-            if g[p][ed.x] > g[p][ed.y]:     # orient
-                ed.x, ed.y = ed.y, ed.x
-            total += g[p][ed.x] + ed.z
-            route.append((ed.x, ed.y))
-            q -= ed.c
-            p = ed.y
-            edges.pop(idx)
-        total += g[p][st]                   # back to depot
-        if route:
-            routes.append(route)
-    return routes, total
+    """Greedy builder (original tie-breaking). Returns (routes, total_cost)."""
+    model = ArcModel([(e.x,e.y,e.z,e.c) for e in edges], g, st)
+    return NearestIndex(model).build(
+        range(len(edges)), Q, skip=False)
 
 # ---------------------------------------------------------------- SA worker
 def sa_worker(pid: int,
@@ -46,80 +36,69 @@ def sa_worker(pid: int,
               g, st: int, Q: int,
               time_budget: float,
               seed: int,
-              out_q: Queue):
+              offer: Callable,
+              decoder: str = "greedy",
+              telemetry: bool = False,
+              start: str = "greedy"):
     rng = random.Random(seed)
-    original_edges = [Edge(*t) for t in edges_data]
-    curr_order = original_edges[:]
-    rng.shuffle(curr_order)
-    curr_routes, curr_val = build_routes([Edge(e.x,e.y,e.z,e.c) for e in curr_order],
-                                         g, st, Q)
+    stats = Counters() if telemetry else None
+    clock = time.perf_counter
+    model = ArcModel(edges_data, g, st)
+    index = NearestIndex(model)
+
+    # both decoders work on arc routes; (u, v) routes are made only for offers
+    def decode(order: List[int]):
+        if decoder == "split":
+            return split(model.orient(order), model, Q)
+        return index.build_arcs(order, Q, skip=False)
+
+    if start == "greedy":
+        curr_order = list(range(len(edges_data)))
+        rng.shuffle(curr_order)
+        curr_routes, curr_val = index.build_arcs(curr_order, Q, skip=False)
+    else:
+        curr_routes, curr_val = index.path_scan(Q, start, rng)
     best_routes, best_val = curr_routes, curr_val
+    if decoder == "split" or start != "greedy":
+        # the chromosome is a task sequence: start from the constructed one
+        curr_order = [a >> 1 for a in giant_tour(curr_routes)]
+        curr_routes, curr_val = decode(curr_order)
+        if curr_val < best_val:
+            best_routes, best_val = curr_routes, curr_val
 
     T0, Tend = 100.0, 1e-2
+    steps = accepted = 0
+    started = clock()
     deadline = time.time() + time_budget
     while time.time() < deadline:
         frac = (deadline - time.time()) / time_budget
         T = T0 * (frac*frac) + Tend
         i, j = rng.sample(range(len(curr_order)), 2)
         curr_order[i], curr_order[j] = curr_order[j], curr_order[i]
-        routes, val = build_routes([Edge(e.x,e.y,e.z,e.c) for e in curr_order],
-                                   g, st, Q)
+        steps += 1
+        if stats: t0 = clock()
+        routes, val = decode(curr_order)
+        if stats: stats.build_time += clock() - t0
         delta = val - curr_val
         if delta < 0 or rng.random() < math.exp(-delta / T):
+            accepted += 1
             curr_routes, curr_val = routes, val
             if val < best_val:
                 best_routes, best_val = routes, val
-                out_q.put((best_val, best_routes))
+                if stats:
+                    t0 = clock()
+                    stats.sends += offer(best_val, model.to_routes(best_routes), pid)
+                    stats.send_time += clock() - t0
+                else:
+                    offer(best_val, model.to_routes(best_routes), pid)
         else:
             curr_order[i], curr_order[j] = curr_order[j], curr_order[i]
-    out_q.put((best_val, best_routes))
-
-# ---------------------------------------------------------------- Floyd-Warshall
-def floyd(n: int, g):
-    for k in range(1, n+1):
-        row_k = g[k]
-        for i in range(1, n+1):
-            ik = g[i][k]
-            if ik == INF: continue
-            row_i = g[i]
-            for j in range(1, n+1):
-                alt = ik + row_k[j]
-                if alt < row_i[j]:
-                    row_i[j] = alt
-
-# ---------------------------------------------------------------- read instance
-def read_instance(path: str):
-    with open(path) as f:
-        _  = f.readline()
-        n  = int(f.readline().split()[2])
-        st = int(f.readline().split()[2])
-        m1 = int(f.readline().split()[3])
-        m2 = int(f.readline().split()[3])
-        _T = int(f.readline().split()[2])
-        Q  = int(f.readline().split()[2])
-        _  = f.readline(); _ = f.readline()
-        m = m1 + m2
-
-        g = [[INF]*(n+1) for _ in range(n+1)]
-        for i in range(1, n+1): g[i][i] = 0
-        edges = []
-        for _ in range(m):
-            x,y,z,c = map(int, f.readline().split())
-            if c: edges.append(Edge(x,y,z,c))
-            if z < g[x][y]: g[x][y] = g[y][x] = z
-        _ = f.readline()
-    floyd(n, g)
-    return n, st, Q, g, edges
-
-# ---------------------------------------------------------------- print answer
-def output(routes, val):
-    print("s ", end="")
-    for i, rt in enumerate(routes):
-        print("0,", end="")
-        for u,v in rt:
-            print(f"({u},{v}),", end="")
-        print("0" if i==len(routes)-1 else "0,", end="")
-    print(f"\nq {val}")
+    offer(best_val, model.to_routes(best_routes), pid)
+    if stats:
+        # every SA step is one decode
+        stats.builds = stats.attempts = steps
+        stats.accepted, stats.wall = accepted, clock() - started
+        return stats.as_dict()
 
 # ---------------------------------------------------------------- main
 def main():
@@ -127,13 +106,26 @@ def main():
     ap.add_argument("instance_file")
     ap.add_argument("-t","--termination", type=float, default=30.0)
     ap.add_argument("-s","--seed", type=int, default=1)
+    ap.add_argument("--format", choices=FORMATS, default="text",
+                    help="answer as s/q text, JSON or binary route arrays")
+    ap.add_argument("--start", choices=STARTS, default="greedy",
+                    help="start constructor: shuffled greedy or path scanning by rule")
+    ap.add_argument("--telemetry", nargs="?", const="-", default=None, metavar="PATH",
+                    help="per-worker counters as JSON (stderr, or PATH)")
+    ap.add_argument("--trace", metavar="PATH", default=None,
+                    help="log (elapsed, cost, worker) per global-best improvement (.csv/.jsonl)")
+    ap.add_argument("-w","--workers", type=int, default=0,
+                    help="worker processes (default: min(20, cpu count))")
+    ap.add_argument("--decoder", choices=("greedy", "split"), default="greedy")
     args = ap.parse_args()
 
     random.seed(args.seed)
-    n, st, Q, g, edges = read_instance(args.instance_file)
-    edges_data = [(e.x,e.y,e.z,e.c) for e in edges]
+    inst = load_instance(args.instance_file)
+    st, Q, edges_data = inst.depot, inst.capacity, inst.tasks()
+    edges = [Edge(*t) for t in edges_data]
+    g = inst.dist()
 
-    workers = min(20, os.cpu_count() or 1)
+    workers = args.workers or min(20, os.cpu_count() or 1)
     if args.termination < 1.5:
         workers = 1
     per_worker = args.termination * 0.5
@@ -141,25 +133,30 @@ def main():
         workers, per_worker = 1, args.termination - 0.05
 
     ctx = get_context("spawn")
-    q: Queue = ctx.Manager().Queue()
+    ch = BestChannel(ctx)
 
     start = time.time()
+    trace = Trace(args.trace, start) if args.trace else None
     # Phase 1: parallel simulated annealing (half time)
-    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
-        for i in range(workers):
-            seed_i = args.seed + 10007 * i
-            pool.submit(sa_worker, i, edges_data, g, st, Q,
-                        per_worker, seed_i, q)
+    # tasks + distance matrix published once; workers attach zero-copy
+    with Segments() as segs, \
+         ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=install, initargs=(ch,)) as pool:
+        shared = segs.share(inst)
+        futs = [pool.submit(run_attached, sa_worker, i, shared, st, Q,
+                            per_worker, args.seed + 10007 * i, offer, args.decoder,
+                            args.telemetry is not None, args.start)
+                for i in range(workers)]
 
         best_val, best_routes = INF, []
         deadline = start + per_worker - 0.01
-        while time.time() < deadline:
-            try:
-                val, routes = q.get(timeout=0.02)
-                if val < best_val:
-                    best_val, best_routes = val, routes
-            except queue.Empty:
-                pass
+        for val, pid, routes in ch.receive(deadline):
+            if val < best_val:
+                best_val, best_routes = val, routes
+                if trace: trace.add(time.time(), val, pid)
+
+    if args.telemetry:
+        emit(report([f.result() for f in futs], time.time() - start), args.telemetry)
 
     if best_val == INF:
         best_routes, best_val = build_routes(edges, g, st, Q)
@@ -204,8 +201,10 @@ def main():
         new_val = sum(route_cost(rt) for rt in new_routes)
         if new_val < best_val:
             best_val, best_routes = new_val, new_routes
+            if trace: trace.add(time.time(), new_val, -1)
 
-    output(best_routes, best_val)
+    if trace: trace.write()
+    write(best_routes, best_val, args.format)
 
 if __name__ == "__main__":
     main()
@@ -2,10 +2,25 @@
 # ------------------------------------------------------------
 #  CARP solver – nearest-feasible greedy + intensify + 8-way parallel
 # ------------------------------------------------------------
-import sys, argparse, time, random, os, queue
-from multiprocessing import get_context, Queue
+import sys, argparse, time, random, os
+from multiprocessing import get_context
 from concurrent.futures import ProcessPoolExecutor
-from typing import List, Tuple, TypeVar
+from typing import Callable, List, Optional, Tuple, TypeVar
+from cache import load_instance
+from channel import BestChannel, install, offer, emigrate, immigrants
+from island import TOPOLOGIES, Elite, Islands, kick
+from shm import Segments, run_attached
+from arcs import ArcModel, ArcRoute
+from greedy import NearestIndex
+from split import giant_tour, split
+from moves import RouteState
+from granular import Granular, granularity, nearest
+from localsearch import LocalSearch, OPERATORS, operators
+from mergesplit import MergeSplit, PATIENCE
+from pathscan import STARTS
+from solution import Solution, TaskTable
+from writer import FORMATS, write
+from telemetry import Counters, Trace, emit, report
 INF = 0x3f3f3f3f
 
 # Route and Edge type aliases
@@ -16,71 +31,47 @@ Route = List[Tuple[int,int]]
 #  Nearest-feasible greedy builder
 # ----------------------------------------------------------------
 def build_routes(edges: List[EdgeT], dist, depot: int, cap: int):
-    edges = edges[:]  # local copy
-    routes, total = [], 0
-    while edges:
-        head, q = depot, cap
-        rt: Route = []
-        while edges:
-            row = dist[head]
-            best_i, best_key = -1, INF
-            for i, (u, v, cost, dem) in enumerate(edges):
-                if dem > q:
-                    continue
-                key = row[u] if row[u] < row[v] else row[v]
-                if key < best_key:
-                    best_key, best_i = key, i
-            if best_i < 0:
-                break
-            u, v, z, d = edges.pop(best_i)
-            if dist[head][u] > dist[head][v]:
-                u, v = v, u
-            total += dist[head][u] + z
-            q -= d
-            head = v
-            rt.append((u, v))
-        total += dist[head][depot]
-        if rt:
-            routes.append(rt)
-    return routes, total
+    return NearestIndex(ArcModel(edges, dist, depot)).build(range(len(edges)), cap)
 
 # ---------------------------------------------------------------- intensify function
-def intensify(routes: List[Route],
-              dist, depot: int, cap: int,
-              demand_map, cost_map,
-              attempts: int=150000) -> Tuple[List[Route], int]:
-    curr = [list(rt) for rt in routes]
-    best = curr
-    def route_cost(rt: Route):
-        tot, cur = 0, depot
-        for u,v in rt:
-            tot += dist[cur][u] + cost_map[(u,v)]
-            cur = v
-        tot += dist[cur][depot]
-        return tot
-    def route_demand(rt: Route):
-        return sum(demand_map[(u,v)] for u,v in rt)
-    curr_val = sum(route_cost(rt) for rt in curr)
-    best_val = curr_val
+def intensify(routes: List[ArcRoute],
+              model: ArcModel, cap: int,
+              attempts: int=150000,
+              stats: Optional[Counters] = None,
+              near: Optional[List[List[int]]] = None) -> Tuple[List[ArcRoute], int]:
+    state = RouteState(routes, model, cap)
+    curr = state.routes
     positions = [(ri, pi)
                  for ri, rt in enumerate(curr)
                  for pi in range(len(rt))]
     rng = random.Random()
+    rejected = accepted = 0
+    moves = Granular(state, near) if near is not None else None
     for _ in range(attempts):
+        if moves is not None:
+            # granular: swap / reinsert a task next to one of its near tasks
+            res = moves.attempt(rng)
+            if res < 0:
+                rejected += 1
+            elif res:
+                accepted += 1
+            continue
         r1,p1 = rng.choice(positions)
         r2,p2 = rng.choice(positions)
         if (r1,p1)==(r2,p2): continue
-        new = [list(rt) for rt in curr]
-        new[r1][p1], new[r2][p2] = new[r2][p2], new[r1][p1]
-        if r1!=r2:
-            if route_demand(new[r1])>cap or route_demand(new[r2])>cap:
-                continue
-        nv = sum(route_cost(rt) for rt in new)
-        if nv < curr_val:
-            curr, curr_val = new, nv
-            if nv < best_val:
-                best, best_val = new, nv
-    return best, best_val
+        if not state.swap_fits(r1, p1, r2, p2):
+            rejected += 1
+            continue
+        a1, a2 = curr[r2][p2], curr[r1][p1]
+        d1, d2 = state.swap_delta(r1, p1, a1, r2, p2, a2)
+        if d1 + d2 < 0:
+            state.swap(r1, p1, a1, r2, p2, a2, d1, d2)
+            accepted += 1
+    if stats is not None:
+        stats.attempts += attempts
+        stats.cap_rejects += rejected
+        stats.accepted += accepted
+    return state.snapshot(), state.total
 
 # ---------------------------------------------------------------- SA worker replaced by shuffle+intensify
 def sa_worker(pid: int,
@@ -88,84 +79,108 @@ def sa_worker(pid: int,
               dist, depot: int, cap: int,
               time_budget: float,
               seed: int,
-              out_q: Queue):
+              offer: Callable,
+              decoder: str = "greedy",
+              migration: Optional[Tuple[float,int]] = None,
+              telemetry: bool = False,
+              granular: int = 0,
+              ls_ops: Tuple[str, ...] = (),
+              descent: str = "first",
+              merge_split: Optional[Tuple[int,int]] = None,
+              start: str = "greedy"):
     rng = random.Random(seed)
-    original = edges_data[:]
+    stats = Counters() if telemetry else None
+    clock = time.perf_counter
 
-    # prepare maps once
-    demand_map = {(u,v):d for u,v,_,d in original}
-    demand_map.update({(v,u):d for u,v,_,d in original})
-    cost_map   = {(u,v):c for u,v,c,_ in original}
-    cost_map.update({(v,u):c for u,v,c,_ in original})
+    # arc model once: every evaluation below is integer indexing
+    model = ArcModel(edges_data, dist, depot)
+    index = NearestIndex(model)
+    near = nearest(model, granular) if granular else None
+    # optional descent over the CARP move set after each intensify
+    ls = LocalSearch(model, cap, ls_ops, descent == "best", near) if ls_ops else None
+    # merge-split: (routes merged per rebuild, subsets sampled per step)
+    ms = MergeSplit(model, cap, *merge_split) if merge_split else None
+    curr: List[ArcRoute] = []
+    curr_val, stall = INF, 0
+    order = list(range(len(edges_data)))
 
     best_val = INF
-    best_routes: List[Route] = []
+    best_routes: List[ArcRoute] = []
     deadline = time.time() + time_budget
 
+    def publish(val: int, routes: List[ArcRoute]):
+        nonlocal best_val, best_routes
+        if val < best_val:
+            t = clock()
+            best_val, best_routes = val, routes
+            sent = offer(best_val, Solution.from_arcs(best_routes, best_val), pid)
+            if stats:
+                stats.sends += sent
+                stats.send_time += clock() - t
+
+    # island mode: (seconds between migrations, migrants per migration)
+    elite = Elite(migration[1]) if migration else None
+    arrivals: List[Solution] = []
+    next_migration = time.time() + migration[0] if migration else INF
+
+    started = clock()
     while time.time() < deadline:
-        rng.shuffle(original)
-        routes, val = build_routes(original, dist, depot, cap)
+        if migration:
+            arrivals = sorted(arrivals + immigrants(pid),
+                              key=lambda sol: sol.val)[:migration[1]]
+        rebuilt = not arrivals and ms is not None and bool(curr) and stall < PATIENCE
+        if stats: t0 = clock()
+        if arrivals:
+            # restart from an immigrant: kicked giant tour, optimal split
+            tour = list(arrivals.pop(0).arcs)
+            routes, val = split(kick(tour, rng), model, cap)
+        elif rebuilt:
+            # rebuild sampled route subsets of the incumbent instead of restarting
+            routes, val = ms.step(curr, rng)
+        else:
+            if start == "greedy":
+                rng.shuffle(order)
+                routes, val = index.build_arcs(order, cap)
+            else:
+                routes, val = index.path_scan(cap, start, rng)
+            if decoder == "split":
+                # re-cut the greedy task sequence optimally
+                routes, val = split(giant_tour(routes), model, cap)
+        if stats:
+            t1 = clock()
+            stats.builds += 1
+            stats.build_time += t1 - t0
 
-        imp_routes, imp_val = intensify(routes, dist, depot, cap,
-                                        demand_map, cost_map,
-                                        attempts=150000)
+        imp_routes, imp_val = intensify(routes, model, cap,
+                                        attempts=150000, stats=stats, near=near)
         if imp_val < val:
             routes, val = imp_routes, imp_val
+        if ls is not None:
+            # the descent stops at the deadline: offer what intensify reached first
+            publish(val, routes)
+            routes, val = ls.run(routes, stats, deadline)
+        if stats:
+            stats.intensify_time += clock() - t1
 
-        if val < best_val:
-            best_val, best_routes = val, routes
-            out_q.put((best_val, best_routes))
-
-    out_q.put((best_val, best_routes))
-
-# ---------------------------------------------------------------- Floyd-Warshall
-def floyd(n: int, dist):
-    for k in range(1, n+1):
-        row_k = dist[k]
-        for i in range(1, n+1):
-            ik = dist[i][k]
-            if ik == INF: continue
-            row_i = dist[i]
-            for j in range(1, n+1):
-                alt = ik + row_k[j]
-                if alt < row_i[j]:
-                    row_i[j] = alt
-
-# ---------------------------------------------------------------- read instance
-def read_instance(path: str):
-    with open(path) as f:
-        _  = f.readline()
-        n  = int(f.readline().split()[2])
-        depot = int(f.readline().split()[2])
-        m1 = int(f.readline().split()[3])
-        m2 = int(f.readline().split()[3])
-        _T = int(f.readline().split()[2])
-        cap= int(f.readline().split()[2])
-        _  = f.readline(); _ = f.readline()
-        m = m1 + m2
-
-        dist = [[INF]*(n+1) for _ in range(n+1)]
-        for i in range(1, n+1): dist[i][i] = 0
-        edges: List[EdgeT] = []
-        for _ in range(m):
-            u,v,z,d = map(int, f.readline().split())
-            if d>0:
-                edges.append((u,v,z,d))
-            if z < dist[u][v]:
-                dist[u][v] = dist[v][u] = z
-        _ = f.readline()
-    floyd(n, dist)
-    return n, depot, cap, dist, edges
-
-# ---------------------------------------------------------------- print answer
-def output(routes: List[Route], val: int):
-    print("s ", end="")
-    for i, rt in enumerate(routes):
-        print("0,", end="")
-        for u, v in rt:
-            print(f"({u},{v}),", end="")
-        print("0" if i==len(routes)-1 else "0,", end="")
-    print(f"\nq {val}")
+        if ms is not None:
+            # a restart resets the incumbent; a rebuild must improve it
+            if not rebuilt or val < curr_val:
+                curr, curr_val, stall = routes, val, 0
+            else:
+                stall += 1
+
+        publish(val, routes)
+
+        if migration:
+            elite.add(val, routes)
+            if time.time() >= next_migration:
+                emigrate(pid, [Solution.from_arcs(r, v) for v, r in elite.best()])
+                next_migration += migration[0]
+
+    offer(best_val, Solution.from_arcs(best_routes, best_val), pid)
+    if stats:
+        stats.wall = clock() - started
+        return stats.as_dict()
 
 # ---------------------------------------------------------------- main
 def main():
@@ -173,12 +188,41 @@ def main():
     ap.add_argument("instance_file")
     ap.add_argument("-t","--termination", type=float, default=30.0)
     ap.add_argument("-s","--seed", type=int, default=1)
+    ap.add_argument("--format", choices=FORMATS, default="text",
+                    help="answer as s/q text, JSON or binary route arrays")
+    ap.add_argument("-w","--workers", type=int, default=0,
+                    help="worker processes (default: min(8, cpu count))")
+    ap.add_argument("--decoder", choices=("greedy", "split"), default="greedy")
+    ap.add_argument("--islands", choices=TOPOLOGIES, default=None,
+                    help="migrate elite solutions between workers")
+    ap.add_argument("--migrate-every", type=float, default=1.0,
+                    help="seconds between migrations (island mode)")
+    ap.add_argument("--migrants", type=int, default=2,
+                    help="solutions sent per migration (island mode)")
+    ap.add_argument("--granular", type=granularity, default=0, metavar="K",
+                    help="local search moves only between each task and its K nearest tasks")
+    ap.add_argument("--ls", type=operators, default=None, metavar="OPS",
+                    help="descent after intensify: 'all' or a comma list of "
+                         + ",".join(OPERATORS))
+    ap.add_argument("--descent", choices=("first", "best"), default="first",
+                    help="apply the first or the best improving move (--ls)")
+    ap.add_argument("--merge-split", type=int, default=0, metavar="P",
+                    help="rebuild P merged routes of the incumbent instead of restarting")
+    ap.add_argument("--ms-samples", type=int, default=8,
+                    help="route subsets tried per merge-split step")
+    ap.add_argument("--start", choices=STARTS, default="greedy",
+                    help="start constructor: shuffled greedy or path scanning by rule")
+    ap.add_argument("--telemetry", nargs="?", const="-", default=None, metavar="PATH",
+                    help="per-worker counters as JSON (stderr, or PATH)")
+    ap.add_argument("--trace", metavar="PATH", default=None,
+                    help="log (elapsed, cost, worker) per global-best improvement (.csv/.jsonl)")
     args = ap.parse_args()
 
     random.seed(args.seed)
-    n, depot, cap, dist, edges = read_instance(args.instance_file)
+    inst = load_instance(args.instance_file)
+    depot, cap, edges = inst.depot, inst.capacity, inst.tasks()
 
-    workers = min(8, os.cpu_count() or 1)
+    workers = args.workers or min(8, os.cpu_count() or 1)
     if args.termination < 1.5:
         workers = 1
     per_worker = args.termination - 0.3
@@ -186,28 +230,42 @@ def main():
         workers, per_worker = 1, args.termination - 0.05
 
     ctx = get_context("spawn")
-    q: Queue = ctx.Manager().Queue()
+    islands = Islands(ctx, workers, args.islands) if args.islands else None
+    migration = (args.migrate_every, args.migrants) if islands else None
+    ch = BestChannel(ctx, islands)
 
     start = time.time()
-    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
-        for i in range(workers):
-            pool.submit(sa_worker, i, edges, dist, depot, cap,
-                        per_worker, args.seed + 10007*i, q)
+    trace = Trace(args.trace, start) if args.trace else None
+    # tasks + distance matrix published once; workers attach zero-copy
+    with Segments() as segs, \
+         ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=install, initargs=(ch,)) as pool:
+        shared = segs.share(inst)
+        futs = [pool.submit(run_attached, sa_worker, i, shared, depot, cap,
+                            per_worker, args.seed + 10007*i, offer, args.decoder,
+                            migration, args.telemetry is not None, args.granular,
+                            args.ls or (), args.descent,
+                            (args.merge_split, args.ms_samples) if args.merge_split else None,
+                            args.start)
+                for i in range(workers)]
 
-        best_val, best_routes = INF, []
+        best_val, best_sol = INF, None
         deadline = start + args.termination - 0.05
-        while time.time() < deadline:
-            try:
-                val, routes = q.get(timeout=0.02)
-                if val < best_val:
-                    best_val, best_routes = val, routes
-            except queue.Empty:
-                pass
+        for val, pid, sol in ch.receive(deadline):
+            if val < best_val:
+                best_val, best_sol = val, sol
+                if trace: trace.add(time.time(), val, pid)
+
+    if args.telemetry:
+        emit(report([f.result() for f in futs], time.time() - start), args.telemetry)
 
     if best_val == INF:
-        best_routes, best_val = build_routes(edges, dist, depot, cap)
+        best_routes, best_val = build_routes(edges, inst.dist(), depot, cap)
+    else:
+        best_routes = best_sol.to_routes(TaskTable(edges))
 
-    output(best_routes, best_val)
+    if trace: trace.write()
+    write(best_routes, best_val, args.format)
 
 if __name__ == "__main__":
     main()
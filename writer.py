@@ -0,0 +1,53 @@
+# ------------------------------------------------------------
+#  Solution output – text, JSON or compact binary, one write each
+# ------------------------------------------------------------
+#  text:   the usual "s 0,(u,v),...,0,0,...,0\nq cost" lines
+#  json:   {"cost": q, "routes": [[[u, v], ...], ...]}
+#  binary: little-endian  b"CARPSOL1" | int64 cost | uint32 route count |
+#          uint32 route lengths | int32 (u, v) pairs
+import json, sys
+from typing import List, Sequence, Tuple
+import numpy as np
+
+FORMATS = ("text", "json", "binary")
+MAGIC = b"CARPSOL1"
+
+Route = Sequence[Tuple[int,int]]
+
+def text(routes: Sequence[Route], val: int) -> str:
+    parts = ["0," + "".join(f"({u},{v})," for u, v in rt) + "0" for rt in routes]
+    return f"s {','.join(parts)}\nq {val}\n"
+
+def to_json(routes: Sequence[Route], val: int) -> str:
+    return json.dumps({"cost": int(val),
+                       "routes": [[[int(u), int(v)] for u, v in rt] for rt in routes]},
+                      separators=(",", ":")) + "\n"
+
+def to_binary(routes: Sequence[Route], val: int) -> bytes:
+    lengths = np.array([len(rt) for rt in routes], dtype="<u4")
+    arcs = np.array([a for rt in routes for a in rt], dtype="<i4").reshape(-1, 2)
+    head = np.array([val], dtype="<i8").tobytes() + np.array([len(lengths)], dtype="<u4").tobytes()
+    return MAGIC + head + lengths.tobytes() + arcs.tobytes()
+
+def from_binary(data: bytes) -> Tuple[List[List[Tuple[int,int]]], int]:
+    if data[:8] != MAGIC:
+        raise ValueError("not a binary CARP solution")
+    val = int(np.frombuffer(data, "<i8", 1, 8)[0])
+    count = int(np.frombuffer(data, "<u4", 1, 16)[0])
+    lengths = np.frombuffer(data, "<u4", count, 20)
+    arcs = np.frombuffer(data, "<i4", 2 * int(lengths.sum()), 20 + 4 * count).reshape(-1, 2)
+    routes, k = [], 0
+    for n in lengths.tolist():
+        routes.append([(u, v) for u, v in arcs[k:k+n].tolist()])
+        k += n
+    return routes, val
+
+def write(routes: Sequence[Route], val: int, fmt: str = "text", out=None):
+    """Render in one buffer and write it with a single call (stdout by default)."""
+    out = out or sys.stdout
+    if fmt == "binary":
+        out = getattr(out, "buffer", out)
+        out.write(to_binary(routes, val))
+    else:
+        out.write(to_json(routes, val) if fmt == "json" else text(routes, val))
+    out.flush()